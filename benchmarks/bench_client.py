@@ -0,0 +1,88 @@
+"""Count the connections each search opens, with and without the pooled client.
+
+"Before" is the old search path: a new TCGdex SDK instance per search, whose
+urllib requests each open their own connection. "After" is the shared pooled
+client, reused by every search. The stub server charges --handshake seconds
+for each new connection, as TCP and TLS setup would.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_client --searches 5 --cards 50 --handshake 0.06
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tcgdexsdk import Query, TCGdex, utils
+
+from tcglabels.tcg_search import search_cards
+from tcglabels.tcgdex_client import TCGdexClient
+
+from .fake_tcgdex import FakeTCGdex
+
+
+async def sdk_search(endpoint: str, concurrency: int) -> int:
+    """Search the way search_cards did before the pooled client."""
+    utils._urlopen.cache_clear()  # the SDK caches responses per URL
+    sdk = TCGdex().setEndpoint(endpoint)
+    brief_cards = await asyncio.to_thread(
+        sdk.card.listSync, Query().contains("name", "Benchmark")
+    )
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        cards = await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, sdk.card.getSync, card.id)
+                for card in brief_cards
+            )
+        )
+    return len(cards)
+
+
+async def run(server: FakeTCGdex, searches: int, concurrency: int, pooled: bool):
+    connections, start = server.connections, time.perf_counter()
+    if pooled:
+        async with TCGdexClient(server.endpoint, pool_size=concurrency) as client:
+            for _ in range(searches):
+                async for _ in search_cards(
+                    {"name": "Benchmark"},
+                    concurrency=concurrency,
+                    cache=None,
+                    client=client,
+                ):
+                    pass
+    else:
+        for _ in range(searches):
+            await sdk_search(server.endpoint, concurrency)
+    elapsed = time.perf_counter() - start
+    opened = server.connections - connections
+    label = "pooled client" if pooled else "SDK per search"
+    print(
+        f"{label:>15}: {elapsed / searches * 1000:7.1f} ms/search,"
+        f" {opened / searches:6.1f} connections/search ({opened} total)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--rtt", type=float, default=0.02)
+    parser.add_argument("--handshake", type=float, default=0.06)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with FakeTCGdex(count=args.cards, rtt=args.rtt, handshake=args.handshake) as server:
+        print(
+            f"{args.searches} searches of {args.cards} cards,"
+            f" {args.rtt * 1000:.0f} ms RTT, {args.handshake * 1000:.0f} ms"
+            f" handshake, concurrency {args.concurrency}"
+        )
+        for pooled in (False, True):
+            asyncio.run(run(server, args.searches, args.concurrency, pooled))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure the memory used by parsed cards, per container.
+
+Cards are parsed from an in-memory dex CSV, as an import would, so repeated
+strings start out as separate objects. "uuid dataclass" is the Card model as
+it was before: a plain dataclass with a random uuid4 id per card.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_models --cards 10000 100000
+"""
+
+import argparse
+import csv
+import gc
+import io
+import pickle
+import random
+import tracemalloc
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+from tcglabels.models import Card, CardBatch
+
+SETS = [f"Benchmark Set {i}" for i in range(40)]
+RARITIES = ["Common", "Uncommon", "Rare", "Rare Holo", "Double Rare", "Promo"]
+FINISHES = ["Normal", "Holo", "RevHolo", "1stEd", "Promo"]
+
+
+@dataclass
+class UuidCard:
+    number: str
+    name: str
+    set_name: str
+    rarity: str
+    finish: str
+    unique_id: str = field(default_factory=lambda: str(uuid4()))
+
+
+def make_csv(count: int) -> str:
+    rng = random.Random(0)
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=";")
+    writer.writerow(["Id", "Name", "Set", "Rarity", "Variant"])
+    for i in range(count):
+        writer.writerow(
+            [
+                f"bench-{i:06d}",
+                f"Benchmark Card {rng.randrange(2000)}",
+                rng.choice(SETS),
+                rng.choice(RARITIES),
+                rng.choice(FINISHES),
+            ]
+        )
+    return out.getvalue()
+
+
+def rows(text: str):
+    for row in csv.DictReader(io.StringIO(text), delimiter=";"):
+        yield row["Id"], row["Name"], row["Set"], row["Rarity"], row["Variant"]
+
+
+def load_uuid_cards(text: str) -> list:
+    return [UuidCard(*fields) for fields in rows(text)]
+
+
+def load_cards(text: str) -> list:
+    return [Card(*fields) for fields in rows(text)]
+
+
+def load_batch(text: str) -> CardBatch:
+    batch = CardBatch()
+    for fields in rows(text):
+        batch.append(*fields)
+    return batch
+
+
+def measure(load, text: str) -> tuple[int, int]:
+    """Return the bytes held by the loaded cards and their pickled size."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cards = load(text)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held, len(pickle.dumps(cards))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    loaders = {
+        "uuid dataclass": load_uuid_cards,
+        "slotted Card": load_cards,
+        "CardBatch": load_batch,
+    }
+    for count in args.cards:
+        text = make_csv(count)
+        print(f"{count} cards")
+        for label, load in loaders.items():
+            held, pickled = measure(load, text)
+            print(
+                f"  {label:>15}: {held / 2**20:7.2f} MiB held"
+                f" ({held / count:5.0f} B/card),"
+                f" {pickled / 2**20:7.2f} MiB pickled"
+            )
+
+
+if __name__ == "__main__":
+    main()
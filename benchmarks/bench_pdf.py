@@ -0,0 +1,51 @@
+"""Compare PDF generation time and size across output modes and sheets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pdf --cards 1000
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+from tcglabels.label_generator import Font, LabelGenerator, OutputMode
+from tcglabels.sheet_layout import SHEET_LAYOUTS
+
+from .bench_render import make_cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=450)
+    parser.add_argument("--height", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    print(f"{args.cards} labels at {args.width}x{args.height}")
+    for output_mode in OutputMode:
+        for sheet in ("None", *SHEET_LAYOUTS):
+            generator = LabelGenerator(
+                size=(args.width, args.height),
+                font=Font.OPENSANS,
+                workers=args.workers,
+                output_mode=output_mode,
+                sheet=SHEET_LAYOUTS.get(sheet),
+            )
+            output = BytesIO()
+            start = time.perf_counter()
+            pages = generator.write_labels_pdf(cards, output)
+            elapsed = time.perf_counter() - start
+            size = output.tell()
+            print(
+                f"{output_mode.value:<8} {sheet:<7}"
+                f" {elapsed * 1000 / len(cards):8.3f} ms/label"
+                f" {pages:6d} pages {size / 1024:10.1f} KiB"
+                f" {size / pages:10.0f} B/page"
+            )
+
+
+if __name__ == "__main__":
+    main()
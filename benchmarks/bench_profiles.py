@@ -0,0 +1,54 @@
+"""Compare PDF generation time and size across render profiles.
+
+RGB is the original output: labels drawn in color and pages saved as JPEG.
+Grayscale and black and white labels are drawn in "L" and "1" mode and
+their pages compressed with Flate.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_profiles --cards 1000
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+from tcglabels.label_generator import Font, LabelGenerator, RenderProfile
+from tcglabels.sheet_layout import SHEET_LAYOUTS
+
+from .bench_render import make_cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=450)
+    parser.add_argument("--height", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    print(f"{args.cards} labels at {args.width}x{args.height}")
+    for sheet in ("None", *SHEET_LAYOUTS):
+        for profile in RenderProfile:
+            generator = LabelGenerator(
+                size=(args.width, args.height),
+                font=Font.OPENSANS,
+                workers=args.workers,
+                sheet=SHEET_LAYOUTS.get(sheet),
+                profile=profile,
+            )
+            output = BytesIO()
+            start = time.perf_counter()
+            pages = generator.write_labels_pdf(cards, output)
+            elapsed = time.perf_counter() - start
+            size = output.tell()
+            print(
+                f"{sheet:<7} {profile.name:<9}"
+                f" {elapsed * 1000 / len(cards):8.3f} ms/label"
+                f" {size / 1024:10.1f} KiB {size / pages:10.0f} B/page"
+            )
+
+
+if __name__ == "__main__":
+    main()
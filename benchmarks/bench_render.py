@@ -0,0 +1,110 @@
+"""Compare the in-memory label render paths against the old PNG round trip.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_render --cards 500 --workers 8
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from tcglabels.label_generator import Font, LabelGenerator
+from tcglabels.models import Card
+
+
+def make_cards(count: int) -> list[Card]:
+    return [
+        Card(
+            number=f"sv3pt5-{i % 207:03d}",
+            name=f"Benchmark Card {i}",
+            set_name="Scarlet & Violet 151",
+            rarity="Common",
+            finish="Holo" if i % 2 else "",
+        )
+        for i in range(count)
+    ]
+
+
+def io_write_bytes() -> int | None:
+    """Bytes this process has passed to write syscalls (files and pipes)."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def png_round_trip(generator: LabelGenerator, cards: list[Card], tmp_dir: str):
+    """The previous pipeline: save each label as PNG, then reopen it."""
+    images = []
+    for card in cards:
+        img_path = f"{tmp_dir}/label_{card.unique_id}.png"
+        generator.generate_label(card, img_path)
+        images.append(Image.open(img_path).convert("RGB"))
+    return images
+
+
+def in_memory(generator: LabelGenerator, cards: list[Card], tmp_dir: str):
+    return [generator.render_label(card) for card in cards]
+
+
+def process_pool(generator: LabelGenerator, cards: list[Card], tmp_dir: str):
+    return list(generator.render_labels(cards))
+
+
+def run(name, fn, generator, cards):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        written_before = io_write_bytes()
+        start = time.perf_counter()
+        images = fn(generator, cards, tmp_dir)
+        elapsed = time.perf_counter() - start
+        written_after = io_write_bytes()
+        files = list(Path(tmp_dir).iterdir())
+        file_bytes = sum(f.stat().st_size for f in files)
+        for img in images:
+            img.close()
+
+    written = (
+        written_after - written_before
+        if written_before is not None and written_after is not None
+        else None
+    )
+    print(
+        f"{name:<16} {elapsed * 1000 / len(cards):8.3f} ms/label  "
+        f"{len(files):6d} files  {file_bytes / 1024:10.1f} KiB on disk  "
+        f"{'n/a' if written is None else f'{written / 1024:.1f} KiB'} written"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--width", type=int, default=450)
+    parser.add_argument("--height", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards)
+    generator = LabelGenerator(
+        size=(args.width, args.height),
+        font=Font.OPENSANS,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+
+    print(f"{args.cards} labels at {args.width}x{args.height}")
+    run("png round trip", png_round_trip, generator, cards)
+    run("in memory", in_memory, generator, cards)
+    run(f"{generator.workers} workers", process_pool, generator, cards)
+
+
+if __name__ == "__main__":
+    main()
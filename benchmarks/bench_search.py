@@ -0,0 +1,110 @@
+"""Measure search_cards wall-clock time against a local fake TCGdex server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search --cards 150 --rtt 0.05 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import time
+
+from tcglabels import tcg_search
+from tcglabels.search_cache import SearchCache
+from tcglabels.tcgdex_client import TCGdexClient
+
+from .fake_tcgdex import FakeTCGdex
+
+
+async def timed_search(endpoint: str, concurrency: int) -> tuple[float, float, int]:
+    """Return the seconds to the first batch and to the last, and the cards."""
+    async with TCGdexClient(endpoint, pool_size=concurrency, retries=0) as client:
+        start = time.perf_counter()
+        first = None
+        found = 0
+        async for batch in tcg_search.search_cards(
+            {"name": "Benchmark"}, concurrency=concurrency, cache=None, client=client
+        ):
+            first = first or time.perf_counter() - start
+            found += len(batch)
+    return first or 0.0, time.perf_counter() - start, found
+
+
+async def abandoned_search(endpoint: str, concurrency: int) -> None:
+    """Stop a search after its first batch, as a superseded search is."""
+    async with TCGdexClient(endpoint, pool_size=concurrency, retries=0) as client:
+        batches = tcg_search.search_cards(
+            {"name": "Benchmark"}, concurrency=concurrency, cache=None, client=client
+        )
+        await anext(batches)
+        await batches.aclose()
+
+
+async def repeated_searches(
+    endpoint: str, users: int, concurrency: int
+) -> tuple[float, dict]:
+    """Run the same search for several users at once, then once more."""
+    cache = SearchCache()
+    searches = [{"name": name} for name in ["Benchmark"] * (users - 1) + ["benchmark "]]
+    async with TCGdexClient(endpoint, pool_size=concurrency, retries=0) as client:
+
+        async def search(form_data: dict):
+            async for _ in tcg_search.search_cards(
+                form_data, concurrency=concurrency, cache=cache, client=client
+            ):
+                pass
+
+        start = time.perf_counter()
+        await asyncio.gather(*(search(form_data) for form_data in searches))
+        await search(searches[0])
+    return time.perf_counter() - start, cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=150)
+    parser.add_argument("--rtt", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--failing", type=int, default=2)
+    parser.add_argument("--users", type=int, default=8)
+    args = parser.parse_args()
+
+    failing = [f"bench-{i:03d}" for i in range(args.failing)]
+    with FakeTCGdex(count=args.cards, rtt=args.rtt, failing=failing) as server:
+        print(
+            f"{args.cards} cards, {args.rtt * 1000:.0f} ms RTT,"
+            f" {args.failing} failing"
+        )
+        for concurrency in sorted({1, args.concurrency}):
+            first, elapsed, found = asyncio.run(
+                timed_search(server.endpoint, concurrency)
+            )
+            expected = args.rtt * (1 + args.cards / concurrency)
+            print(
+                f"concurrency {concurrency:3d}: {elapsed:7.2f} s"
+                f" (~{expected:.2f} s expected), first batch {first:5.2f} s,"
+                f" {found} cards"
+            )
+
+        requests = server.requests
+        asyncio.run(abandoned_search(server.endpoint, args.concurrency))
+        time.sleep(args.rtt * 2)  # let cancelled requests reach the server
+        print(
+            f"search closed after its first batch:"
+            f" {server.requests - requests} of {args.cards + 1} requests made"
+        )
+
+        requests = server.requests
+        elapsed, stats = asyncio.run(
+            repeated_searches(server.endpoint, args.users, args.concurrency)
+        )
+        print(
+            f"{args.users} identical searches + 1 repeat: {elapsed:7.2f} s,"
+            f" {server.requests - requests} upstream requests,"
+            f" {stats['misses']} miss, {stats['coalesced']} coalesced,"
+            f" {stats['hits']} hit, hit rate {stats['hit_rate']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare the draw.text and glyph atlas text engines for speed and output.
+
+Labels are rendered with each engine from a collection where set names and
+rarities repeat, as in a real import, and compared pixel by pixel.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_text --cards 2000
+"""
+
+import argparse
+import time
+
+from PIL import ImageChops
+
+from tcglabels.label_generator import (
+    Font,
+    LabelGenerator,
+    RenderProfile,
+    TextEngine,
+    preload_fonts,
+)
+from tcglabels.models import Card
+from tcglabels.text_atlas import text_cache
+
+from .bench_models import RARITIES, SETS
+from .bench_render import make_cards
+
+
+def make_collection(count: int) -> list[Card]:
+    return [
+        Card(
+            number=card.number,
+            name=card.name,
+            set_name=SETS[i % len(SETS)],
+            rarity=RARITIES[i % len(RARITIES)],
+            finish=card.finish,
+        )
+        for i, card in enumerate(make_cards(count))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--width", type=int, default=450)
+    parser.add_argument("--height", type=int, default=150)
+    args = parser.parse_args()
+
+    cards = make_collection(args.cards)
+    size = (args.width, args.height)
+    print(f"{args.cards} labels at {args.width}x{args.height}")
+    for profile in RenderProfile:
+        generators = {
+            engine: LabelGenerator(
+                size=size,
+                font=Font.OPENSANS,
+                workers=1,
+                profile=profile,
+                text_engine=engine,
+            )
+            for engine in TextEngine
+        }
+        preload_fonts([size], [Font.OPENSANS])
+        text_cache.clear()
+        for engine, generator in generators.items():
+            start = time.perf_counter()
+            for card in cards:
+                generator.render_label(card).close()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{profile.name:<9} {engine.value:<8}"
+                f" {elapsed * 1000 / len(cards):7.3f} ms/label"
+            )
+
+        differing = worst = 0
+        for card in cards:
+            expected = generators[TextEngine.FREETYPE].render_label(card)
+            actual = generators[TextEngine.ATLAS].render_label(card)
+            diff = ImageChops.difference(expected.convert("L"), actual.convert("L"))
+            differing += sum(diff.histogram()[1:])
+            worst = max(worst, diff.getextrema()[1])
+        print(
+            f"{'':<9} {differing} pixels differ, by at most {worst};"
+            f" line cache {text_cache.hits} hits, {text_cache.misses} misses"
+        )
+
+
+if __name__ == "__main__":
+    main()
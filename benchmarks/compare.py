@@ -0,0 +1,74 @@
+"""Compare two benchmark suite results, case by case.
+
+Cases whose throughput dropped by more than the threshold are marked, and
+the exit status is 1 if there are any, so this can gate a change in CI.
+
+Run from the repository root:
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+CASE_FIELDS = ("method", "font", "size", "batch", "workers")
+
+
+def load_results(path: str) -> tuple[dict, dict[tuple, dict]]:
+    with open(path) as f:
+        report = json.load(f)
+    cases = {
+        tuple(result[field] for field in CASE_FIELDS): result
+        for result in report["results"]
+    }
+    return report, cases
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Fractional drop in labels/s counted as a regression",
+    )
+    args = parser.parse_args()
+
+    before_report, before = load_results(args.before)
+    after_report, after = load_results(args.after)
+    print(f"{before_report['commit']} -> {after_report['commit']}")
+
+    regressions = 0
+    for case in sorted(before.keys() & after.keys()):
+        old, new = before[case], after[case]
+        speed = change(old["labels_per_second"], new["labels_per_second"])
+        rss = change(old["peak_rss_bytes"], new["peak_rss_bytes"])
+        size = change(old["bytes_per_page"], new["bytes_per_page"])
+        regressed = speed < -args.threshold
+        regressions += regressed
+        method, font, label_size, batch, _ = case
+        print(
+            f"{'!' if regressed else ' '} {method:<26} {font:<13}"
+            f" {label_size:<10} {batch:>6}"
+            f" {old['labels_per_second']:9.1f} -> {new['labels_per_second']:9.1f}"
+            f" labels/s ({speed:+7.1%})"
+            f"  RSS {rss:+7.1%}  B/page {size:+7.1%}"
+        )
+
+    unmatched = len(before.keys() ^ after.keys())
+    if unmatched:
+        print(f"{unmatched} cases were only run once and are not compared")
+    if regressions:
+        print(f"{regressions} cases slowed down by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
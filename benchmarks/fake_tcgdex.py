@@ -0,0 +1,140 @@
+"""A local stand-in for the TCGdex API with a configurable round-trip time."""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def full_card(card_id: str, name: str) -> dict:
+    set_id, _, local_id = card_id.rpartition("-")
+    return {
+        "id": card_id,
+        "localId": local_id,
+        "name": name,
+        "image": None,
+        "illustrator": "Benchmark",
+        "rarity": "Common",
+        "category": "Pokemon",
+        "variants": {
+            "normal": True,
+            "reverse": True,
+            "holo": False,
+            "firstEdition": False,
+            "wPromo": False,
+        },
+        "set": {
+            "id": set_id,
+            "name": "Benchmark Set",
+            "logo": None,
+            "symbol": None,
+            "cardCount": {"official": 999, "total": 999},
+        },
+        "legal": {"standard": True, "expanded": True},
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops concurrent connects
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on cancelled requests; that's expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeTCGdex:
+    """Serve `count` cards named "Benchmark Card <n>" from a local port.
+
+    Every request waits `rtt` seconds before it is answered, and every new
+    connection waits `handshake` seconds, standing in for TCP and TLS setup.
+    Card ids listed in `failing` answer with HTTP 500.
+
+    Example:
+        with FakeTCGdex(count=150, rtt=0.05) as server:
+            TCGdex.endpoint = server.endpoint
+    """
+
+    def __init__(
+        self, count: int = 150, rtt: float = 0.05, failing=(), handshake: float = 0.0
+    ):
+        self.cards = [
+            full_card(f"bench-{i:03d}", f"Benchmark Card {i}") for i in range(count)
+        ]
+        self.by_id = {card["id"]: card for card in self.cards}
+        self.rtt = rtt
+        self.handshake = handshake
+        self.failing = set(failing)
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are sent separately; without this, Nagle's
+            # algorithm delays every kept-alive response by ~40 ms.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                fake.connections += 1
+                time.sleep(fake.handshake)
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                time.sleep(fake.rtt)
+                with fake._lock:
+                    fake.in_flight -= 1
+                url = urlsplit(self.path)
+                parts = [unquote(part) for part in url.path.split("/") if part]
+                status, body = 404, None
+                if parts[-1] == "cards":
+                    status, body = 200, fake.list_cards(parse_qs(url.query))
+                elif len(parts) >= 2 and parts[-2] == "cards":
+                    card = fake.by_id.get(parts[-1])
+                    if parts[-1] in fake.failing:
+                        status = 500
+                    elif card is not None:
+                        status, body = 200, card
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def list_cards(self, params: dict) -> list[dict]:
+        name = params.get("name", [""])[0].lower()
+        return [
+            {key: card[key] for key in ("id", "localId", "name", "image")}
+            for card in self.cards
+            if name in card["name"].lower()
+        ]
+
+    def __enter__(self) -> "FakeTCGdex":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,244 @@
+"""Benchmark label rendering and PDF generation across fonts, sizes and batches.
+
+Every combination of generator method, font, label size and batch size runs
+in a fresh process, so its peak RSS is its own. Fonts that can't be loaded on
+this host are skipped. Results are written as JSON, which benchmarks.compare
+diffs between two runs, e.g. before and after a commit.
+
+Stage times split each run into laying out text, drawing it, encoding PDF
+pages, saving PNG files and everything else (writing the PDF, file I/O). They
+are only recorded with --workers 1, since other workers render in their own
+processes.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --batches 1 100 1000 --output before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from PIL import Image
+
+from tcglabels import label_generator
+from tcglabels.label_generator import (
+    LABEL_SIZES,
+    Font,
+    LabelGenerator,
+    font_height,
+    load_font,
+    preload_fonts,
+)
+
+from .bench_render import make_cards
+
+METHODS = (
+    "generate_label",
+    "generate_labels",
+    "generate_labels_pdf",
+    "generate_labels_pdf_bytes",
+)
+
+BATCH_SIZES = (1, 10, 100, 1000, 10_000)
+
+
+class StageTimer:
+    """Time spent in patched functions, per stage.
+
+    Time is counted once, against the outermost stage running, so stages add
+    up to no more than the total.
+    """
+
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self._depth = 0
+
+    def patch(self, owner, name: str, stage: str) -> None:
+        func = getattr(owner, name)
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            if self._depth:
+                return func(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                self.seconds[stage] = (
+                    self.seconds.get(stage, 0.0) + time.perf_counter() - start
+                )
+
+        setattr(owner, name, timed)
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process and its children, in bytes."""
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def directory_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def run_case(method: str, font: str, size: str, batch: int, workers: int) -> dict:
+    """Run one benchmark case in this process and return its measurements."""
+    generator = LabelGenerator(size=LABEL_SIZES[size], font=Font[font], workers=workers)
+    preload_fonts([generator.size], [generator.font])
+    cards = make_cards(batch)
+
+    timer = StageTimer()
+    if workers == 1:
+        timer.patch(LabelGenerator, "layout", "layout")
+        timer.patch(LabelGenerator, "_draw_lines", "draw")
+        timer.patch(label_generator, "encode_page", "encode")
+        timer.patch(Image.Image, "save", "save")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        if method == "generate_label":
+            for card in cards:
+                generator.generate_label(card, f"{tmp}/label_{card.unique_id}.png")
+        elif method == "generate_labels":
+            generator.generate_labels(cards, tmp)
+        elif method == "generate_labels_pdf":
+            generator.generate_labels_pdf(cards, f"{tmp}/labels.pdf")
+        else:
+            pdf = generator.generate_labels_pdf_bytes(cards)
+        seconds = time.perf_counter() - start
+        output_bytes = len(pdf) if method.endswith("_bytes") else directory_size(tmp)
+
+    stages = dict(timer.seconds)
+    if stages:
+        stages["other"] = max(seconds - sum(stages.values()), 0.0)
+    return {
+        "method": method,
+        "font": font,
+        "size": size,
+        "batch": batch,
+        "workers": workers,
+        "seconds": seconds,
+        "labels_per_second": batch / seconds,
+        "peak_rss_bytes": peak_rss(),
+        "output_bytes": output_bytes,
+        # Each label is one PDF page or one PNG file.
+        "bytes_per_page": output_bytes / batch,
+        "stages": stages,
+    }
+
+
+def run_case_process(case: dict) -> dict:
+    """Run one benchmark case in a new interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--case", json.dumps(case)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def available_fonts(fonts: list[str]) -> list[str]:
+    available = []
+    for font in fonts:
+        try:
+            load_font(Font[font], font_height(next(iter(LABEL_SIZES.values()))))
+        except OSError:
+            print(f"Skipping {font}: {Font[font].path} can't be loaded")
+            continue
+        available.append(font)
+    return available
+
+
+def git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    parser.add_argument(
+        "--fonts",
+        nargs="+",
+        choices=[font.name for font in Font],
+        default=[font.name for font in Font],
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", choices=list(LABEL_SIZES), default=list(LABEL_SIZES)
+    )
+    parser.add_argument("--batches", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(**json.loads(args.case))))
+        return
+
+    results = []
+    for font in available_fonts(args.fonts):
+        for size in args.sizes:
+            for method in args.methods:
+                for batch in args.batches:
+                    case = {
+                        "method": method,
+                        "font": font,
+                        "size": size,
+                        "batch": batch,
+                        "workers": args.workers,
+                    }
+                    result = run_case_process(case)
+                    results.append(result)
+                    stages = " ".join(
+                        f"{stage}={seconds * 1000 / batch:.2f}"
+                        for stage, seconds in result["stages"].items()
+                    )
+                    print(
+                        f"{method:<26} {font:<13} {size:<10} {batch:>6}"
+                        f" {result['labels_per_second']:9.1f} labels/s"
+                        f" {result['peak_rss_bytes'] / 2**20:7.1f} MiB"
+                        f" {result['bytes_per_page']:9.0f} B/page"
+                        f"  ms/label {stages}"
+                    )
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.process_cpu_count(),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
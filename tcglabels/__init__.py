@@ -1,4 +1,5 @@
-from . import models, state
-from .pages import from_dex, index, search
+import time
 
-__all__ = ["models", "state", "index", "search", "from_dex"]
+# When this process started importing the package. The app reports the time
+# its worker spent importing from here.
+IMPORT_STARTED = time.perf_counter()
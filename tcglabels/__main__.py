@@ -0,0 +1,208 @@
+"""Render labels for a collection without the web app.
+
+Render the cards of Dex CSV exports, or of TCGdex card ids, to a PDF or to a
+directory of PNG files:
+
+    python -m tcglabels collection.csv --size '2.0"x1.0"' -o labels.pdf
+    python -m tcglabels --ids swsh3-136 sv3pt5-025 --format png -o labels/
+    python -m tcglabels --ids-file nightly.txt --sheet Letter -o nightly.pdf
+
+Card ids are looked up in the local catalog first and then in the TCGdex API,
+with one label per variant of each card, as in the app's search.
+"""
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from .dex_import import DexReader, NotADexExport
+from .label_generator import (
+    LABEL_SIZES,
+    Font,
+    LabelGenerator,
+    OutputMode,
+    RenderProfile,
+)
+from .metrics import STAGE_SECONDS
+from .models import CardBatch
+from .sheet_layout import SHEET_LAYOUTS
+from .tcg_search import FETCH_CONCURRENCY, variant_cards
+
+logger = logging.getLogger(__name__)
+
+
+def read_csvs(paths: list[Path], cards: CardBatch) -> int:
+    """Add the cards of Dex CSV exports to a batch.
+
+    Malformed rows are logged by DexReader and skipped.
+
+    Returns:
+        int: The number of malformed rows skipped.
+
+    """
+    skipped = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            reader = DexReader(f)
+            for card in reader:
+                cards.append(
+                    card.number, card.name, card.set_name, card.rarity, card.finish
+                )
+        skipped += len(reader.errors)
+    return skipped
+
+
+async def read_ids(ids: list[str], cards: CardBatch, concurrency: int) -> list[str]:
+    """Add one card per variant of the cards with the given ids to a batch.
+
+    Returns:
+        list[str]: The ids that were not found.
+
+    """
+    from .catalog import open_catalog
+    from .tcgdex_client import TCGdexClient
+
+    found = {}
+    catalog = open_catalog()
+    if catalog is not None:
+        for card in catalog.get_cards(ids):
+            found[card.id] = variant_cards(
+                card.id, card.name, card.rarity, card.set_name, card.variants
+            )
+
+    missing = [card_id for card_id in dict.fromkeys(ids) if card_id not in found]
+    if missing:
+        async with TCGdexClient(pool_size=concurrency) as client:
+            fetched = await asyncio.gather(
+                *(client.get_card(card_id) for card_id in missing),
+                return_exceptions=True,
+            )
+        fetched_cards = []
+        for card_id, card in zip(missing, fetched):
+            if isinstance(card, Exception):
+                logger.warning("Could not fetch card %s: %r", card_id, card)
+                continue
+            fetched_cards.append(card)
+            found[card_id] = variant_cards(
+                card.id, card.name, card.rarity, card.set.name, card.variants
+            )
+        if catalog is not None and fetched_cards:
+            try:
+                catalog.add_cards(fetched_cards)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Could not add cards to the catalog: %r", e)
+
+    for card_id in ids:
+        for card in found.get(card_id, ()):
+            cards.append(
+                card.number, card.name, card.set_name, card.rarity, card.finish
+            )
+    return [card_id for card_id in ids if card_id not in found]
+
+
+def print_stages() -> None:
+    stages = STAGE_SECONDS.snapshot()
+    for (stage,), (_, seconds, count) in sorted(
+        stages.items(), key=lambda item: -item[1][1]
+    ):
+        print(f"  {stage:<10} {seconds:8.2f} s  {count:8d} times")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m tcglabels",
+        description="Render labels for Dex CSV exports or TCGdex card ids.",
+    )
+    parser.add_argument("csvs", nargs="*", type=Path, help="Dex CSV exports")
+    parser.add_argument("--ids", nargs="+", default=[], help="TCGdex card ids")
+    parser.add_argument(
+        "--ids-file", type=Path, help="file of TCGdex card ids, one per line"
+    )
+    parser.add_argument("--size", choices=LABEL_SIZES, default='1.5"x0.5"')
+    parser.add_argument(
+        "--font", choices=[font.name for font in Font], default=Font.OPENSANS.name
+    )
+    parser.add_argument(
+        "--output-mode",
+        choices=[mode.value for mode in OutputMode],
+        default=OutputMode.RASTER.value,
+    )
+    parser.add_argument(
+        "--profile",
+        choices=[profile.name for profile in RenderProfile],
+        default=RenderProfile.RGB.name,
+    )
+    parser.add_argument("--sheet", choices=SHEET_LAYOUTS)
+    parser.add_argument(
+        "--format",
+        choices=["pdf", "png"],
+        help="output format, by default from the output's suffix",
+    )
+    parser.add_argument("-o", "--output", type=Path, default=Path("labels.pdf"))
+    parser.add_argument(
+        "--workers", type=int, help="render processes, by default one per CPU"
+    )
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    ids = list(args.ids)
+    if args.ids_file:
+        ids += [line.strip() for line in args.ids_file.read_text().splitlines()]
+        ids = [card_id for card_id in ids if card_id and not card_id.startswith("#")]
+    if not args.csvs and not ids:
+        parser.error("give at least one CSV file, --ids or --ids-file")
+    output_format = args.format or ("pdf" if args.output.suffix == ".pdf" else "png")
+
+    start = time.perf_counter()
+    cards = CardBatch()
+    try:
+        skipped = read_csvs(args.csvs, cards)
+    except (OSError, NotADexExport) as e:
+        parser.exit(1, f"{parser.prog}: {e}\n")
+    missing = asyncio.run(read_ids(ids, cards, args.concurrency)) if ids else []
+    read_seconds = time.perf_counter() - start
+    print(
+        f"Read {len(cards)} cards in {read_seconds:.2f} s"
+        + (f", skipped {skipped} malformed rows" if skipped else "")
+        + (f", {len(missing)} ids not found" if missing else "")
+    )
+    if not cards:
+        parser.exit(1, "Nothing to render\n")
+
+    generator = LabelGenerator(
+        size=LABEL_SIZES[args.size],
+        font=Font[args.font],
+        workers=args.workers,
+        output_mode=OutputMode(args.output_mode),
+        sheet=SHEET_LAYOUTS.get(args.sheet),
+        profile=RenderProfile[args.profile],
+    )
+    start = time.perf_counter()
+    if output_format == "pdf":
+        generator.generate_labels_pdf(cards, str(args.output))
+        written = f"{len(cards)} labels"
+        output_bytes = args.output.stat().st_size
+    else:
+        paths = generator.generate_labels(cards, str(args.output))
+        written = f"{len(paths)} label images"
+        output_bytes = sum(Path(path).stat().st_size for path in paths)
+    render_seconds = time.perf_counter() - start
+
+    print(
+        f"Wrote {written} to {args.output}"
+        f" ({output_bytes / 2**20:.1f} MiB) in {render_seconds:.2f} s:"
+        f" {len(cards) / render_seconds:.1f} labels/s"
+        f" ({generator.workers} render processes)"
+    )
+    print_stages()
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import hashlib
+import hmac
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, NamedTuple
+from urllib.parse import urlencode
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse, Response
+
+# Where generated files are kept. Every worker process on a host should use
+# the same directory, so a file made by one can be served by another.
+ARTIFACT_DIR = Path(os.environ.get("TCGLABELS_ARTIFACT_DIR", ".tcglabels/artifacts"))
+
+# Seconds a file is kept after it was last generated or downloaded.
+ARTIFACT_TTL = 3600.0
+
+# Seconds a download URL stays valid. Kept well below ARTIFACT_TTL so a file
+# is never removed while a URL to it is live.
+DOWNLOAD_URL_LIFETIME = 300.0
+
+# Minimum seconds between scans for expired files.
+CLEANUP_INTERVAL = 60.0
+
+# Where download URLs are served, on the backend.
+ARTIFACT_ROUTE = "/artifacts"
+
+# Content hash file names, as made by ArtifactStore.write.
+_NAME_PATTERN = re.compile(r"[0-9a-f]{64}\.[a-z]+")
+
+# Content types of the suffixes written to the store.
+_MEDIA_TYPES = {".pdf": "application/pdf"}
+
+
+class Artifact(NamedTuple):
+    """A generated file in an ArtifactStore."""
+
+    name: str  # SHA-256 of the content and the suffix, e.g. "3f…a1.pdf"
+    size: int
+
+
+class _HashingSink:
+    """A file that hashes what is written to it."""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+
+class ArtifactStore:
+    """Generated files on local disk, named by the hash of their content.
+
+    Files are also recorded under the key of the request that made them, e.g.
+    a digest of the selected cards and label settings, so repeating a request
+    reuses the file instead of generating it again. Files not generated or
+    downloaded within the TTL are removed.
+
+    Files are handed out as short-lived URLs signed with a key shared by the
+    worker processes using the directory.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = ARTIFACT_DIR,
+        ttl: float = ARTIFACT_TTL,
+        secret: bytes | None = None,
+    ):
+        """Initialize the ArtifactStore.
+
+        Args:
+            directory (str | Path, optional): Where files are kept. Defaults
+                to ARTIFACT_DIR.
+            ttl (float, optional): Seconds a file is kept after its last use.
+                Defaults to ARTIFACT_TTL.
+            secret (bytes | None, optional): Key signing download URLs.
+                Defaults to TCGLABELS_ARTIFACT_SECRET if set, otherwise to a
+                key generated once and kept in the directory.
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._secret = secret
+        self._lock = threading.Lock()
+        self._cleaned_at = 0.0
+
+    def get(self, key: str) -> Artifact | None:
+        """Return the file recorded for a request key, or None if there is none.
+
+        Args:
+            key (str): The request key, a hex digest.
+
+        Returns:
+            Artifact | None: The file, whose TTL starts over.
+
+        """
+        ref = self.directory / "requests" / key
+        try:
+            name = ref.read_text()
+            size = self._touch(self.directory / name)
+            os.utime(ref)
+        except OSError:
+            return None
+        return Artifact(name, size)
+
+    def write(
+        self, key: str, write: Callable[[BinaryIO], object], suffix: str = ".pdf"
+    ) -> Artifact:
+        """Generate a file and record it under a request key.
+
+        The file is written under a temporary name and renamed to its content
+        hash once complete, so it is never served partially written. If write
+        raises, nothing is stored.
+
+        Args:
+            key (str): The request key, a hex digest.
+            write (Callable[[BinaryIO], object]): Writes the content to the
+                file it is passed.
+            suffix (str, optional): File name suffix. Defaults to ".pdf".
+
+        Returns:
+            Artifact: The stored file.
+
+        """
+        (self.directory / "requests").mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                sink = _HashingSink(f)
+                write(sink)
+            name = sink.digest.hexdigest() + suffix
+            os.replace(tmp_path, self.directory / name)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._write_ref(key, name)
+
+        if time.monotonic() - self._cleaned_at > CLEANUP_INTERVAL:
+            self.cleanup()
+        return Artifact(name, sink.size)
+
+    def path(self, name: str) -> Path | None:
+        """Return the path of a stored file, or None if it is not stored."""
+        if not _NAME_PATTERN.fullmatch(name):
+            return None
+        path = self.directory / name
+        try:
+            self._touch(path)
+        except OSError:
+            return None
+        return path
+
+    def download_path(
+        self, name: str, filename: str, lifetime: float = DOWNLOAD_URL_LIFETIME
+    ) -> str:
+        """Return a signed URL path to download a stored file.
+
+        Args:
+            name (str): The stored file's name.
+            filename (str): The name the browser saves the file as.
+            lifetime (float, optional): Seconds the URL stays valid. Defaults
+                to DOWNLOAD_URL_LIFETIME.
+
+        Returns:
+            str: The path and query, relative to the backend's root.
+
+        """
+        expires = int(time.time() + lifetime)
+        query = urlencode(
+            {
+                "filename": filename,
+                "expires": expires,
+                "signature": self._sign(name, filename, expires),
+            }
+        )
+        return f"{ARTIFACT_ROUTE}/{name}?{query}"
+
+    def verify(self, name: str, filename: str, expires: int, signature: str) -> bool:
+        """Return whether a download URL was signed by this store."""
+        return hmac.compare_digest(signature, self._sign(name, filename, expires))
+
+    def cleanup(self) -> int:
+        """Remove the files and request keys not used within the TTL.
+
+        Returns:
+            int: The number of files removed.
+
+        """
+        with self._lock:
+            self._cleaned_at = time.monotonic()
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in [*self.directory.glob("*.*"), *self.directory.glob("requests/*")]:
+            if path.name.startswith("."):
+                continue
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            if path.parent == self.directory:
+                removed += 1
+        return removed
+
+    def _touch(self, path: Path) -> int:
+        os.utime(path)
+        return path.stat().st_size
+
+    def _write_ref(self, key: str, name: str) -> None:
+        ref = self.directory / "requests" / key
+        fd, tmp_path = tempfile.mkstemp(dir=ref.parent)
+        with os.fdopen(fd, "w") as f:
+            f.write(name)
+        os.replace(tmp_path, ref)
+
+    def _sign(self, name: str, filename: str, expires: int) -> str:
+        message = f"{name}\x1f{filename}\x1f{expires}".encode()
+        return hmac.new(self._key(), message, hashlib.sha256).hexdigest()
+
+    def _key(self) -> bytes:
+        with self._lock:
+            if self._secret is None:
+                self._secret = _load_secret(self.directory)
+            return self._secret
+
+
+def _load_secret(directory: Path) -> bytes:
+    """Return the signing key from the environment, or the directory's key."""
+    if os.environ.get("TCGLABELS_ARTIFACT_SECRET"):
+        return os.environ["TCGLABELS_ARTIFACT_SECRET"].encode()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / ".secret"
+    if not path.exists():
+        # Link a complete key file into place, so workers racing to create it
+        # all end up reading the same key.
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(32).hex().encode())
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+    return path.read_bytes()
+
+
+async def artifact_endpoint(request: Request) -> Response:
+    """Serve a stored file to the holder of a valid download URL.
+
+    Range requests are supported, so interrupted downloads can resume.
+    """
+    name = request.path_params["name"]
+    filename = request.query_params.get("filename", name)
+    try:
+        expires = int(request.query_params["expires"])
+        signature = request.query_params["signature"]
+    except (KeyError, ValueError):
+        return PlainTextResponse("Forbidden\n", status_code=403)
+    if not artifact_store.verify(name, filename, expires, signature):
+        return PlainTextResponse("Forbidden\n", status_code=403)
+    if expires < time.time():
+        return PlainTextResponse("Download link expired\n", status_code=410)
+    path = artifact_store.path(name)
+    if path is None:
+        return PlainTextResponse("Not found\n", status_code=404)
+    return FileResponse(
+        path,
+        media_type=_MEDIA_TYPES.get(path.suffix, "application/octet-stream"),
+        filename=filename,
+    )
+
+
+# Files generated by the app's exports and imports.
+artifact_store = ArtifactStore()
@@ -0,0 +1,497 @@
+"""Local snapshot of the TCGdex card catalog.
+
+Fill the catalog from the API, or from a JSON file of full cards:
+
+    python -m tcglabels.catalog sync
+    python -m tcglabels.catalog load cards.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from tcgdexsdk.models.Card import Card as TCGCard
+from tcgdexsdk.models.subs import CardVariants
+
+from .tcgdex_client import TCGdexClient
+
+logger = logging.getLogger(__name__)
+
+# Where the app looks for the catalog. search_cards only uses it if it exists.
+CATALOG_PATH = Path(os.environ.get("TCGLABELS_CATALOG", ".tcglabels/catalog.sqlite3"))
+
+# Seconds a snapshot answers searches after it was synced. Older catalogs are
+# ignored until synced again, so cards released since reach the search.
+CATALOG_MAX_AGE = float(os.environ.get("TCGLABELS_CATALOG_MAX_AGE", 7 * 86400))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sets (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rarities (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id TEXT PRIMARY KEY,
+    local_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    set_id TEXT NOT NULL,
+    set_name TEXT NOT NULL,
+    rarity TEXT NOT NULL,
+    normal INTEGER NOT NULL,
+    reverse INTEGER NOT NULL,
+    holo INTEGER NOT NULL,
+    first_edition INTEGER NOT NULL,
+    w_promo INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cards_name ON cards (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS cards_set_name ON cards (set_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS cards_rarity ON cards (rarity COLLATE NOCASE);
+
+-- Trigram index answering the API's case-insensitive "contains" filters. It
+-- holds case folded copies of the columns, since LIKE only folds ASCII.
+CREATE VIRTUAL TABLE IF NOT EXISTS cards_folded USING fts5(
+    id, name, set_name, rarity, tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS cards_folded_ai AFTER INSERT ON cards BEGIN
+    INSERT INTO cards_folded (rowid, id, name, set_name, rarity)
+    VALUES (
+        new.rowid,
+        casefold(new.id),
+        casefold(new.name),
+        casefold(new.set_name),
+        casefold(new.rarity)
+    );
+END;
+CREATE TRIGGER IF NOT EXISTS cards_folded_ad AFTER DELETE ON cards BEGIN
+    DELETE FROM cards_folded WHERE rowid = old.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS cards_folded_au AFTER UPDATE ON cards BEGIN
+    DELETE FROM cards_folded WHERE rowid = old.rowid;
+    INSERT INTO cards_folded (rowid, id, name, set_name, rarity)
+    VALUES (
+        new.rowid,
+        casefold(new.id),
+        casefold(new.name),
+        casefold(new.set_name),
+        casefold(new.rarity)
+    );
+END;
+
+-- The index of earlier versions, which matched non-ASCII text case-sensitively.
+DROP TRIGGER IF EXISTS cards_ai;
+DROP TRIGGER IF EXISTS cards_ad;
+DROP TRIGGER IF EXISTS cards_au;
+DROP TABLE IF EXISTS cards_fts;
+"""
+
+_CARD_COLUMNS = (
+    "id",
+    "local_id",
+    "name",
+    "set_id",
+    "set_name",
+    "rarity",
+    "normal",
+    "reverse",
+    "holo",
+    "first_edition",
+    "w_promo",
+)
+
+# Search fields and the catalog columns they filter, as in tcg_search.
+_SEARCH_COLUMNS = {
+    "name": "name",
+    "set_name": "set_name",
+    "rarity": "rarity",
+    "id": "id",
+}
+
+
+class CatalogCard(NamedTuple):
+    id: str
+    local_id: str
+    name: str
+    set_id: str
+    set_name: str
+    rarity: str
+    variants: CardVariants
+
+
+class Catalog:
+    """A SQLite store of cards, sets and rarities."""
+
+    def __init__(self, path: str | Path = CATALOG_PATH):
+        """Initialize the Catalog, creating the database if needed.
+
+        Args:
+            path (str | Path, optional): The database file. Defaults to
+                CATALOG_PATH.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            # Index the cards of a catalog made before cards_folded existed.
+            if conn.execute("SELECT count(*) FROM cards_folded").fetchone()[0] == 0:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO cards_folded (rowid, id, name, set_name, rarity)"
+                        " SELECT rowid, casefold(id), casefold(name),"
+                        " casefold(set_name), casefold(rarity) FROM cards"
+                    )
+
+    def add_cards(self, cards: Iterable[TCGCard]) -> int:
+        """Add or replace full cards from the TCGdex SDK.
+
+        Returns:
+            int: The number of cards written.
+
+        """
+        return self._write_cards(_card_row(card) for card in cards)
+
+    def add_card_dicts(self, cards: Iterable[dict]) -> int:
+        """Add or replace full cards in the TCGdex API's JSON format.
+
+        Returns:
+            int: The number of cards written.
+
+        """
+        return self._write_cards(_card_dict_row(card) for card in cards)
+
+    def add_rarities(self, rarities: Iterable[str]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO rarities (name) VALUES (?)",
+                ((rarity,) for rarity in rarities),
+            )
+
+    @property
+    def synced_at(self) -> str | None:
+        """When the catalog was last filled with a full snapshot, if ever."""
+        return self._get_meta("synced_at")
+
+    @property
+    def synced_time(self) -> float | None:
+        """synced_at as seconds since the epoch, if the catalog was synced."""
+        synced_at = self.synced_at
+        if synced_at is None:
+            return None
+        # datetime('now') is UTC.
+        return (
+            datetime.fromisoformat(synced_at).replace(tzinfo=timezone.utc).timestamp()
+        )
+
+    @property
+    def failed_ids(self) -> list[str]:
+        """The cards the last sync could not fetch, if it was incomplete."""
+        return json.loads(self._get_meta("failed_ids") or "[]")
+
+    def mark_synced(self) -> None:
+        """Record that the catalog now holds a full snapshot."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value)"
+                " VALUES ('synced_at', datetime('now'))"
+            )
+            conn.execute("DELETE FROM meta WHERE key = 'failed_ids'")
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT count(*) FROM cards").fetchone()[0]
+
+    def search(self, form_data: dict) -> list[CatalogCard]:
+        """Find the cards matching every filled in search field.
+
+        Each field matches case-insensitively anywhere in its column, like the
+        TCGdex API's "contains" filter.
+
+        Args:
+            form_data (dict): Search fields, as passed to search_cards.
+
+        Returns:
+            list[CatalogCard]: The matching cards.
+
+        """
+        conditions = []
+        params = []
+        for field, column in _SEARCH_COLUMNS.items():
+            if form_data.get(field):
+                conditions.append(f"cards_folded.{column} LIKE ? ESCAPE '\\'")
+                params.append(f"%{_escape_like(form_data[field].casefold())}%")
+        if not conditions:
+            return []
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(f'cards.{c}' for c in _CARD_COLUMNS)}"
+                " FROM cards_folded JOIN cards ON cards.rowid = cards_folded.rowid"
+                f" WHERE {' AND '.join(conditions)} ORDER BY cards.rowid",
+                params,
+            ).fetchall()
+        return [
+            CatalogCard(*row[:6], CardVariants(*(bool(v) for v in row[6:])))
+            for row in rows
+        ]
+
+    def get_cards(self, ids: Iterable[str]) -> list[CatalogCard]:
+        """Return the cards with the given ids, skipping ids not in the catalog.
+
+        Args:
+            ids (Iterable[str]): TCGdex card ids, e.g. "swsh3-136".
+
+        Returns:
+            list[CatalogCard]: The cards found, in catalog order.
+
+        """
+        ids = list(ids)
+        if not ids:
+            return []
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TEMP TABLE wanted (id TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO wanted (id) VALUES (?)",
+                ((card_id,) for card_id in ids),
+            )
+            rows = conn.execute(
+                f"SELECT {', '.join(f'cards.{c}' for c in _CARD_COLUMNS)}"
+                " FROM cards JOIN wanted ON cards.id = wanted.id"
+                " ORDER BY cards.rowid"
+            ).fetchall()
+        return [
+            CatalogCard(*row[:6], CardVariants(*(bool(v) for v in row[6:])))
+            for row in rows
+        ]
+
+    async def sync(self, client: TCGdexClient, concurrency: int = 16) -> int:
+        """Download every card, set and rarity from the TCGdex API.
+
+        Cards that fail to download are tried once more. If some still fail,
+        their ids are kept in failed_ids and the catalog is not marked as
+        synced, so searches keep going to the API until a sync completes.
+
+        Args:
+            client (TCGdexClient): The client to fetch with.
+            concurrency (int, optional): Maximum number of requests in
+                flight. Defaults to 16.
+
+        Returns:
+            int: The number of cards written.
+
+        """
+        from .tcg_search import fetch_full_cards
+
+        sets = await client.list_sets()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sets (id, name) VALUES (?, ?)",
+                ((card_set.id, card_set.name) for card_set in sets),
+            )
+        self.add_rarities(await client.list_rarities())
+
+        brief_cards = await client.list_cards()
+        failed = []
+        cards = await fetch_full_cards(
+            client, brief_cards, concurrency=concurrency, failed=failed
+        )
+        if failed:
+            retry = [card for card in brief_cards if card.id in set(failed)]
+            failed = []
+            cards += await fetch_full_cards(
+                client, retry, concurrency=concurrency, failed=failed
+            )
+        count = self.add_cards(cards)
+        if failed:
+            self._set_meta("failed_ids", json.dumps(sorted(failed)))
+        else:
+            self.mark_synced()
+        return count
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.create_function("casefold", 1, str.casefold, deterministic=True)
+        return conn
+
+    def _get_meta(self, key: str) -> str | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def _write_cards(self, rows: Iterable[tuple]) -> int:
+        rows = list(rows)
+        with closing(self._connect()) as conn, conn:
+            # An upsert rather than INSERT OR REPLACE, so the update trigger
+            # keeps the search index in step.
+            conn.executemany(
+                f"INSERT INTO cards ({', '.join(_CARD_COLUMNS)})"
+                f" VALUES ({', '.join('?' for _ in _CARD_COLUMNS)})"
+                " ON CONFLICT (id) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in _CARD_COLUMNS[1:]),
+                rows,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO sets (id, name) VALUES (?, ?)",
+                {(row[3], row[4]) for row in rows},
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO rarities (name) VALUES (?)",
+                {(row[5],) for row in rows},
+            )
+        return len(rows)
+
+
+def open_catalog(
+    path: str | Path = CATALOG_PATH, max_age: float = CATALOG_MAX_AGE
+) -> Catalog | None:
+    """Return the catalog at path, or None if it does not hold a recent snapshot.
+
+    Args:
+        path (str | Path, optional): The database file. Defaults to
+            CATALOG_PATH.
+        max_age (float, optional): Seconds a snapshot is used for after it
+            was synced. Defaults to CATALOG_MAX_AGE.
+
+    Returns:
+        Catalog | None: The catalog, or None if it was never synced or was
+            synced more than max_age ago.
+
+    """
+    if not Path(path).exists():
+        return None
+    catalog = Catalog(path)
+    synced_time = catalog.synced_time
+    if synced_time is None:
+        return None
+    if time.time() - synced_time > max_age:
+        logger.warning(
+            "Not using the catalog at %s: it was last synced at %s UTC",
+            path,
+            catalog.synced_at,
+        )
+        return None
+    return catalog
+
+
+# Seconds shared_catalog waits before looking again for a catalog that was
+# missing or stale.
+CATALOG_RECHECK_INTERVAL = 60.0
+
+# Catalogs returned by shared_catalog, by path, and when to open each again.
+_shared_catalogs: dict[Path, tuple[Catalog | None, float]] = {}
+
+
+def shared_catalog(path: str | Path = CATALOG_PATH) -> Catalog | None:
+    """Return this process's catalog at path, or None as open_catalog would.
+
+    The catalog is opened by the first call and reused by later calls until
+    its snapshot is CATALOG_MAX_AGE old. A missing or stale catalog is looked
+    for again every CATALOG_RECHECK_INTERVAL seconds, so one synced while the
+    app runs is picked up.
+    """
+    catalog, recheck_at = _shared_catalogs.get(Path(path), (None, 0.0))
+    if time.time() < recheck_at:
+        return catalog
+    catalog = open_catalog(path)
+    if catalog is None:
+        recheck_at = time.time() + CATALOG_RECHECK_INTERVAL
+    else:
+        recheck_at = catalog.synced_time + CATALOG_MAX_AGE
+    _shared_catalogs[Path(path)] = (catalog, recheck_at)
+    return catalog
+
+
+def _card_row(card: TCGCard) -> tuple:
+    variants = card.variants
+    return (
+        card.id,
+        card.localId,
+        card.name,
+        card.set.id,
+        card.set.name,
+        card.rarity,
+        variants.normal,
+        variants.reverse,
+        variants.holo,
+        variants.firstEdition,
+        variants.wPromo,
+    )
+
+
+def _card_dict_row(card: dict) -> tuple:
+    variants = card.get("variants") or {}
+    return (
+        card["id"],
+        card.get("localId", ""),
+        card["name"],
+        card["set"]["id"],
+        card["set"]["name"],
+        card.get("rarity", ""),
+        bool(variants.get("normal")),
+        bool(variants.get("reverse")),
+        bool(variants.get("holo")),
+        bool(variants.get("firstEdition")),
+        bool(variants.get("wPromo")),
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _sync(catalog: Catalog, concurrency: int) -> int:
+    async with TCGdexClient(pool_size=concurrency) as client:
+        return await catalog.sync(client, concurrency=concurrency)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the local card catalog.")
+    parser.add_argument("--catalog", default=CATALOG_PATH, type=Path)
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="download the catalog from TCGdex")
+    sync.add_argument("--concurrency", type=int, default=16)
+    load = commands.add_parser("load", help="load full cards from JSON files")
+    load.add_argument("files", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.catalog)
+    if args.command == "sync":
+        count = asyncio.run(_sync(catalog, args.concurrency))
+    else:
+        count = 0
+        for file in args.files:
+            count += catalog.add_card_dicts(json.loads(file.read_text()))
+        catalog.mark_synced()
+    print(f"Wrote {count} cards to {args.catalog} ({catalog.count()} in total)")
+    failed = catalog.failed_ids
+    if failed:
+        parser.exit(
+            1,
+            f"Could not fetch {len(failed)} cards ({', '.join(failed[:10])}"
+            f"{', ...' if len(failed) > 10 else ''}); the catalog is not"
+            " marked as synced. Run sync again.\n",
+        )
+
+
+if __name__ == "__main__":
+    main()
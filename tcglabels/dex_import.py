@@ -0,0 +1,198 @@
+import codecs
+import csv
+import logging
+import time
+from typing import BinaryIO, Iterator, NamedTuple
+
+from .models import Card
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload at a time.
+READ_CHUNK_SIZE = 64 * 1024
+
+# Dex export columns and the Card fields they fill.
+DEX_COLUMNS = {
+    "Id": "number",
+    "Name": "name",
+    "Set": "set_name",
+    "Rarity": "rarity",
+    "Variant": "finish",
+}
+
+# Byte order marks, longest first since the UTF-32 LE mark starts with the
+# UTF-16 LE one. The codecs named here strip the mark themselves.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class MalformedRow(NamedTuple):
+    """A row of a dex export that could not be imported."""
+
+    line: int
+    reason: str
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Guess the encoding of a file from its first bytes.
+
+    Byte order marks are trusted. Otherwise text with every other byte zero
+    is taken as UTF-16, valid UTF-8 as UTF-8, and anything else as Latin-1.
+
+    Args:
+        head (bytes): The start of the file.
+
+    Returns:
+        str: A codec name.
+
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if len(head) >= 2:
+        if head[1::2].count(0) > len(head) // 4 and not head[0::2].count(0):
+            return "utf-16-le"
+        if head[0::2].count(0) > len(head) // 4 and not head[1::2].count(0):
+            return "utf-16-be"
+    try:
+        # The head may end part way through a character.
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+class NotADexExport(ValueError):
+    """Raised when a file's header lacks the columns of a dex export."""
+
+
+class DexReader:
+    """Read the cards of a dex CSV export from a binary stream.
+
+    The stream is read and decoded a chunk at a time, so memory use does not
+    grow with the size of the file. Rows that can't be imported are skipped
+    and recorded in errors.
+
+    Example:
+        reader = DexReader(upload.file)
+        generator.write_labels_pdf(reader, sink)
+        for error in reader.errors:
+            ...
+
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        chunk_size: int = READ_CHUNK_SIZE,
+        delimiter: str = ";",
+    ):
+        """Initialize the DexReader.
+
+        Args:
+            stream (BinaryIO): The export, opened for binary reading.
+            chunk_size (int, optional): Bytes read at a time. Defaults to
+                READ_CHUNK_SIZE.
+            delimiter (str, optional): The column separator. Defaults to ";".
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.delimiter = delimiter
+        self.encoding: str | None = None
+        self.rows = 0
+        self.errors: list[MalformedRow] = []
+        self.decode_seconds = 0.0
+
+    def __iter__(self) -> Iterator[Card]:
+        """Yield a Card for each valid row.
+
+        Raises:
+            NotADexExport: If the header lacks the Id or Name column.
+        """
+        reader = csv.reader(self._lines(), delimiter=self.delimiter, strict=True)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {name.strip(): index for index, name in enumerate(header)}
+        missing = [name for name in ("Id", "Name") if name not in columns]
+        if missing:
+            raise NotADexExport(f"Not a dex export: no {', '.join(missing)} column")
+        indices = {field: columns.get(column) for column, field in DEX_COLUMNS.items()}
+
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                self._malformed(reader.line_num, str(e))
+                continue
+            if not any(row):
+                continue
+            self.rows += 1
+            if len(row) != len(header):
+                self._malformed(
+                    reader.line_num,
+                    f"expected {len(header)} fields, found {len(row)}",
+                )
+                continue
+            fields = {
+                field: row[index] if index is not None else ""
+                for field, index in indices.items()
+            }
+            if not fields["number"] and not fields["name"]:
+                self._malformed(reader.line_num, "no Id or Name")
+                continue
+            yield Card(**fields)
+
+    def _malformed(self, line: int, reason: str) -> None:
+        logger.warning("Skipping line %d of dex export: %s", line, reason)
+        self.errors.append(MalformedRow(line, reason))
+
+    def _chunks(self) -> Iterator[str]:
+        head = self.stream.read(self.chunk_size)
+        self.encoding = sniff_encoding(head)
+        # UTF-8 was only checked against the head, so decode it strictly and
+        # fall back to Latin-1 if the rest of the file isn't UTF-8 after all.
+        errors = "strict" if self.encoding == "utf-8" else "replace"
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors=errors)
+        chunk = head
+        offset = 0
+        while True:
+            final = not chunk
+            start = time.perf_counter()
+            try:
+                text = decoder.decode(chunk, final=final)
+            except UnicodeDecodeError as e:
+                # The error is placed in the bytes held back from the last
+                # chunk followed by this one.
+                pending, _ = decoder.getstate()
+                logger.warning(
+                    "Dex export is not UTF-8 at byte %d, reading the rest as Latin-1",
+                    offset - len(pending) + e.start,
+                )
+                self.encoding = "latin-1"
+                decoder = codecs.getincrementaldecoder(self.encoding)()
+                text = decoder.decode(pending + chunk, final=final)
+            self.decode_seconds += time.perf_counter() - start
+            yield text
+            if final:
+                return
+            offset += len(chunk)
+            chunk = self.stream.read(self.chunk_size)
+
+    def _lines(self) -> Iterator[str]:
+        # Split on "\n" only, keeping it: csv handles "\r\n" and line breaks
+        # inside quoted fields itself.
+        rest = ""
+        for text in self._chunks():
+            *lines, rest = (rest + text).split("\n")
+            for line in lines:
+                yield line + "\n"
+        if rest:
+            yield rest
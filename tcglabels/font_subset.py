@@ -0,0 +1,255 @@
+import struct
+from functools import lru_cache
+from typing import Iterable
+
+# Tables kept in a subset. Layout tables (GPOS, GSUB, ...) and names are not
+# used by PDF viewers for simple fonts, and post is replaced by a version 3
+# table without glyph names.
+_SUBSET_TABLES = (
+    b"cmap",
+    b"cvt ",
+    b"fpgm",
+    b"glyf",
+    b"head",
+    b"hhea",
+    b"hmtx",
+    b"loca",
+    b"maxp",
+    b"post",
+    b"prep",
+)
+
+# Composite glyph flags.
+_ARG_1_AND_2_ARE_WORDS = 0x0001
+_WE_HAVE_A_SCALE = 0x0008
+_MORE_COMPONENTS = 0x0020
+_WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+_WE_HAVE_A_TWO_BY_TWO = 0x0080
+
+
+class TrueTypeFont:
+    """A TrueType font file with the metrics needed to embed it in a PDF."""
+
+    def __init__(self, data: bytes):
+        """Initialize the TrueTypeFont.
+
+        Args:
+            data (bytes): The contents of a TrueType (glyf based) font file.
+
+        Raises:
+            ValueError: If the data is not a TrueType font.
+        """
+        if data[:4] not in (b"\x00\x01\x00\x00", b"true"):
+            raise ValueError("Only TrueType outline fonts can be embedded")
+        self.data = data
+        self.tables: dict[bytes, bytes] = {}
+        (num_tables,) = struct.unpack_from(">H", data, 4)
+        for i in range(num_tables):
+            tag, _, offset, length = struct.unpack_from(">4sIII", data, 12 + 16 * i)
+            end = offset + length
+            self.tables[tag] = data[offset:end]
+
+        head = self.tables[b"head"]
+        (self.units_per_em,) = struct.unpack_from(">H", head, 18)
+        self.bbox = struct.unpack_from(">hhhh", head, 36)
+        (self._index_to_loc_format,) = struct.unpack_from(">h", head, 50)
+
+        hhea = self.tables[b"hhea"]
+        self.ascent, self.descent = struct.unpack_from(">hh", hhea, 4)
+        (self._num_h_metrics,) = struct.unpack_from(">H", hhea, 34)
+        (self.num_glyphs,) = struct.unpack_from(">H", self.tables[b"maxp"], 4)
+
+        self.cap_height = self.ascent
+        os2 = self.tables.get(b"OS/2", b"")
+        if len(os2) >= 90 and struct.unpack_from(">H", os2, 0)[0] >= 2:
+            (self.cap_height,) = struct.unpack_from(">h", os2, 88)
+
+        self._cmap = self._parse_cmap()
+
+    @classmethod
+    @lru_cache(maxsize=8)
+    def from_path(cls, path: str) -> "TrueTypeFont":
+        """Load a font file, reusing fonts already parsed by this process."""
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def glyph_id(self, char: str) -> int:
+        """Return the glyph for a character, or 0 (.notdef) if it has none."""
+        return self._cmap.get(ord(char), 0)
+
+    def advance(self, glyph_id: int) -> int:
+        """Return the advance width of a glyph in font units."""
+        index = min(glyph_id, self._num_h_metrics - 1)
+        (advance,) = struct.unpack_from(">H", self.tables[b"hmtx"], 4 * index)
+        return advance
+
+    def scale(self, value: int) -> int:
+        """Convert font units to the 1/1000 em units used by PDF."""
+        return round(value * 1000 / self.units_per_em)
+
+    def subset(self, chars: Iterable[str]) -> bytes:
+        """Return a font file containing only the glyphs for some characters.
+
+        Glyph ids and the character map are kept, so the subset can be used
+        in place of the full font. Unused glyphs are left empty.
+
+        Args:
+            chars (Iterable[str]): The characters that must render.
+
+        Returns:
+            bytes: The subset font file.
+
+        """
+        keep = {0} | {self.glyph_id(char) for char in chars}
+        pending = list(keep)
+        while pending:
+            for component in self._components(pending.pop()):
+                if component not in keep:
+                    keep.add(component)
+                    pending.append(component)
+
+        glyf = bytearray()
+        offsets = []
+        for glyph_id in range(self.num_glyphs):
+            offsets.append(len(glyf))
+            if glyph_id in keep:
+                glyf += self._glyph(glyph_id)
+                glyf += b"\x00" * (-len(glyf) % 4)
+        offsets.append(len(glyf))
+
+        tables = {tag: self.tables[tag] for tag in _SUBSET_TABLES if tag in self.tables}
+        tables[b"glyf"] = bytes(glyf)
+        tables[b"loca"] = struct.pack(f">{len(offsets)}I", *offsets)
+        head = bytearray(self.tables[b"head"])
+        struct.pack_into(">I", head, 8, 0)  # checkSumAdjustment
+        struct.pack_into(">h", head, 50, 1)  # long loca offsets
+        tables[b"head"] = bytes(head)
+        if b"post" in tables:
+            tables[b"post"] = b"\x00\x03\x00\x00" + tables[b"post"][4:32]
+
+        font, table_offsets = _build_sfnt(tables)
+        adjustment = (0xB1B0AFBA - _checksum(font)) & 0xFFFFFFFF
+        font = bytearray(font)
+        struct.pack_into(">I", font, table_offsets[b"head"] + 8, adjustment)
+        return bytes(font)
+
+    def _glyph(self, glyph_id: int) -> bytes:
+        loca = self.tables[b"loca"]
+        if self._index_to_loc_format == 0:
+            start, end = struct.unpack_from(">HH", loca, 2 * glyph_id)
+            start, end = start * 2, end * 2
+        else:
+            start, end = struct.unpack_from(">II", loca, 4 * glyph_id)
+        return self.tables[b"glyf"][start:end]
+
+    def _components(self, glyph_id: int) -> list[int]:
+        glyph = self._glyph(glyph_id)
+        if len(glyph) < 10 or struct.unpack_from(">h", glyph, 0)[0] >= 0:
+            return []
+        components = []
+        offset = 10
+        while True:
+            flags, component = struct.unpack_from(">HH", glyph, offset)
+            components.append(component)
+            offset += 4
+            offset += 4 if flags & _ARG_1_AND_2_ARE_WORDS else 2
+            if flags & _WE_HAVE_A_SCALE:
+                offset += 2
+            elif flags & _WE_HAVE_AN_X_AND_Y_SCALE:
+                offset += 4
+            elif flags & _WE_HAVE_A_TWO_BY_TWO:
+                offset += 8
+            if not flags & _MORE_COMPONENTS:
+                return components
+
+    def _parse_cmap(self) -> dict[int, int]:
+        cmap = self.tables[b"cmap"]
+        (num_subtables,) = struct.unpack_from(">H", cmap, 2)
+        subtables = {}
+        for i in range(num_subtables):
+            platform, encoding, offset = struct.unpack_from(">HHI", cmap, 4 + 8 * i)
+            subtables[(platform, encoding)] = offset
+
+        for platform_encoding in ((3, 10), (0, 4), (3, 1), (0, 3)):
+            offset = subtables.get(platform_encoding)
+            if offset is None:
+                continue
+            (subtable_format,) = struct.unpack_from(">H", cmap, offset)
+            if subtable_format == 12:
+                return _parse_cmap_format_12(cmap, offset)
+            if subtable_format == 4:
+                return _parse_cmap_format_4(cmap, offset)
+        raise ValueError("The font has no Unicode character map")
+
+
+def _parse_cmap_format_4(cmap: bytes, offset: int) -> dict[int, int]:
+    (seg_count_x2,) = struct.unpack_from(">H", cmap, offset + 6)
+    seg_count = seg_count_x2 // 2
+    ends_at = offset + 14
+    starts_at = ends_at + seg_count_x2 + 2
+    deltas_at = starts_at + seg_count_x2
+    range_offsets_at = deltas_at + seg_count_x2
+    ends = struct.unpack_from(f">{seg_count}H", cmap, ends_at)
+    starts = struct.unpack_from(f">{seg_count}H", cmap, starts_at)
+    deltas = struct.unpack_from(f">{seg_count}h", cmap, deltas_at)
+    range_offsets = struct.unpack_from(f">{seg_count}H", cmap, range_offsets_at)
+
+    mapping = {}
+    for i in range(seg_count):
+        for char in range(starts[i], ends[i] + 1):
+            if char == 0xFFFF:
+                break
+            if range_offsets[i] == 0:
+                glyph_id = (char + deltas[i]) & 0xFFFF
+            else:
+                glyph_at = (
+                    range_offsets_at + 2 * i + range_offsets[i] + 2 * (char - starts[i])
+                )
+                (glyph_id,) = struct.unpack_from(">H", cmap, glyph_at)
+                if glyph_id:
+                    glyph_id = (glyph_id + deltas[i]) & 0xFFFF
+            if glyph_id:
+                mapping[char] = glyph_id
+    return mapping
+
+
+def _parse_cmap_format_12(cmap: bytes, offset: int) -> dict[int, int]:
+    (num_groups,) = struct.unpack_from(">I", cmap, offset + 12)
+    mapping = {}
+    for i in range(num_groups):
+        start, end, glyph_id = struct.unpack_from(">III", cmap, offset + 16 + 12 * i)
+        for char in range(start, end + 1):
+            mapping[char] = glyph_id + char - start
+    return mapping
+
+
+def _checksum(data: bytes) -> int:
+    data += b"\x00" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+
+def _build_sfnt(tables: dict[bytes, bytes]) -> tuple[bytes, dict[bytes, int]]:
+    tags = sorted(tables)
+    num_tables = len(tags)
+    entry_selector = num_tables.bit_length() - 1
+    search_range = 16 * (1 << entry_selector)
+    header = struct.pack(
+        ">IHHHH",
+        0x00010000,
+        num_tables,
+        search_range,
+        entry_selector,
+        num_tables * 16 - search_range,
+    )
+
+    directory = b""
+    body = b""
+    offsets = {}
+    for tag in tags:
+        table = tables[tag]
+        offsets[tag] = len(header) + 16 * num_tables + len(body)
+        directory += struct.pack(
+            ">4sIII", tag, _checksum(table), offsets[tag], len(table)
+        )
+        body += table + b"\x00" * (-len(table) % 4)
+    return header + directory + body, offsets
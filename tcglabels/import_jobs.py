@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+import uuid
+from enum import Enum
+from itertools import chain
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from .artifacts import Artifact, ArtifactStore, artifact_store
+from .dex_import import DexReader, MalformedRow, NotADexExport
+from .label_generator import LabelGenerator
+from .metrics import STAGE_SECONDS, log_request
+from .models import Card, CardBatch
+
+logger = logging.getLogger(__name__)
+
+# Seconds a finished job is kept for its owner to collect.
+JOB_RETENTION = 600.0
+
+
+class ImportStage(Enum):
+    QUEUED = "Queued"
+    PARSING = "Parsing"
+    RENDERING = "Rendering"
+    DONE = "Done"
+    CANCELLED = "Cancelled"
+    FAILED = "Failed"
+
+    @property
+    def finished(self) -> bool:
+        return self in (ImportStage.DONE, ImportStage.CANCELLED, ImportStage.FAILED)
+
+
+class ImportCancelled(Exception):
+    """Raised inside a job's thread when the job is cancelled."""
+
+
+class ImportJob:
+    """Parse dex exports and render their labels into a PDF.
+
+    run() does the work and is meant for a worker thread. The progress
+    attributes can be read from any thread while it runs, and cancel() stops
+    it at the next card. The PDF is written to an artifact store, and reused
+    if the same cards were imported with the same settings before.
+    """
+
+    def __init__(
+        self,
+        files: Iterable[BinaryIO],
+        generator: LabelGenerator,
+        store: ArtifactStore = artifact_store,
+    ):
+        """Initialize the ImportJob.
+
+        Args:
+            files (Iterable[BinaryIO]): The uploaded exports.
+            generator (LabelGenerator): Renders the labels.
+            store (ArtifactStore, optional): Where the PDF is written.
+                Defaults to the shared artifact_store.
+        """
+        self.id = uuid.uuid4().hex
+        self.files = list(files)
+        self.generator = generator
+        self.store = store
+        self.stage = ImportStage.QUEUED
+        self.rows_parsed = 0
+        self.labels_rendered = 0
+        self.label_count = 0
+        self.errors: list[MalformedRow] = []
+        self.error: str | None = None
+        self.artifact: Artifact | None = None
+        self.reused = False
+        self.finished_at: float | None = None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the job to stop. It stops at the next card it handles."""
+        self._cancelled.set()
+
+    def run(self) -> None:
+        """Run the job to the end, recording the outcome in stage."""
+        start = time.perf_counter()
+        try:
+            self.stage = ImportStage.PARSING
+            cards = self._parse()
+            self.label_count = len(cards)
+            key = self.generator.pdf_key(cards)
+            self.artifact = self.store.get(key)
+            if self.artifact is not None:
+                self.reused = True
+                self.labels_rendered = self.label_count
+            else:
+                self.stage = ImportStage.RENDERING
+                self.artifact = self.store.write(key, self._write_pdf(cards))
+            self.stage = ImportStage.DONE
+        except ImportCancelled:
+            self.stage = ImportStage.CANCELLED
+        except NotADexExport as e:
+            self.error = str(e)
+            self.stage = ImportStage.FAILED
+        except Exception as e:
+            logger.exception("Import job %s failed", self.id)
+            self.error = f"Import failed: {e}"
+            self.stage = ImportStage.FAILED
+        finally:
+            self.files = []
+            self.finished_at = time.monotonic()
+            log_request(
+                "import",
+                time.perf_counter() - start,
+                job=self.id,
+                stage=self.stage.name.lower(),
+                rows=self.rows_parsed,
+                cards=self.label_count,
+                malformed_rows=len(self.errors),
+                output_bytes=self.artifact.size if self.artifact else 0,
+                reused=self.reused,
+            )
+
+    def _parse(self) -> CardBatch:
+        readers = [DexReader(file) for file in self.files]
+        cards = CardBatch()
+        start = time.perf_counter()
+        try:
+            for card in chain.from_iterable(readers):
+                self._check_cancelled()
+                cards.append(
+                    card.number, card.name, card.set_name, card.rarity, card.finish
+                )
+                self.rows_parsed += 1
+        finally:
+            # Decoding happens as the readers are iterated; count it apart
+            # from splitting and converting the rows.
+            decode = sum(reader.decode_seconds for reader in readers)
+            STAGE_SECONDS.observe(decode, stage="decode")
+            STAGE_SECONDS.observe(time.perf_counter() - start - decode, stage="parse")
+        self.errors = [error for reader in readers for error in reader.errors]
+        return cards
+
+    def _write_pdf(self, cards: CardBatch) -> Callable[[BinaryIO], None]:
+        def write(sink: BinaryIO) -> None:
+            self.generator.write_labels_pdf(
+                self._cancellable(cards), sink, on_page=self._count_rendered
+            )
+            self._check_cancelled()
+
+        return write
+
+    def _cancellable(self, cards: CardBatch) -> Iterator[Card]:
+        # Cards are pulled as rendering proceeds, a few chunks ahead of the
+        # pages being written, so cancelling stops the renderers promptly.
+        for card in cards:
+            self._check_cancelled()
+            yield card
+
+    def _count_rendered(self, labels: int) -> None:
+        # Counted as pages are written, so progress never runs ahead of the
+        # output.
+        self.labels_rendered += labels
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise ImportCancelled
+
+
+class JobRegistry:
+    """The import jobs of this process, by id."""
+
+    def __init__(self, retention: float = JOB_RETENTION):
+        """Initialize the JobRegistry.
+
+        Args:
+            retention (float, optional): Seconds finished jobs are kept.
+                Defaults to JOB_RETENTION.
+        """
+        self.retention = retention
+        self._jobs: dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: ImportJob) -> None:
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> ImportJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id: str) -> ImportJob | None:
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def _prune(self) -> None:
+        """Drop finished jobs nobody collected within the retention time."""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+
+
+# Jobs started by the app's dex imports.
+import_jobs = JobRegistry()
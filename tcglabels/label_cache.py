@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .pdf_writer import EncodedPage
+
+# Suffix of entries being written to the on-disk tier.
+_TEMP_SUFFIX = ".tmp"
+
+# Seconds after which a temporary file on disk is taken to be left behind by
+# a writer that crashed, and removed when the tier is pruned.
+_TEMP_FILE_LIFETIME = 3600.0
+
+
+def label_key(*parts) -> str:
+    """Return a content hash identifying a label rendered from the given parts.
+
+    Args:
+        *parts: Everything the rendered label depends on, e.g. the card
+            fields, the label size and the font.
+
+    Returns:
+        str: A hex digest usable as a cache key and file name.
+
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class LabelCache:
+    """A cache of encoded label pages keyed by label content.
+
+    Lookups go to an in-process LRU tier first and then, if a directory is
+    configured, to an on-disk tier that can be shared by every worker process
+    on a host. Both tiers are bounded by size in bytes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        directory: str | Path | None = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+    ):
+        """Initialize the LabelCache.
+
+        Args:
+            max_bytes (int, optional): Size limit of the in-process tier.
+                Defaults to 64 MiB.
+            directory (str | Path | None, optional): Directory of the on-disk
+                tier. Defaults to None, which disables it.
+            max_disk_bytes (int, optional): Size limit of the on-disk tier.
+                Defaults to 1 GiB.
+        """
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._pages: OrderedDict[str, EncodedPage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key: str) -> EncodedPage | None:
+        """Return the cached page for a key, or None on a miss."""
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return page
+
+        page = self._read_disk(key)
+        with self._lock:
+            if page is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, page)
+        return page
+
+    def put(self, key: str, page: EncodedPage) -> None:
+        """Add a page to both cache tiers."""
+        with self._lock:
+            self._store(key, page)
+        self._write_disk(key, page)
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache counters and sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._pages),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self) -> None:
+        """Empty the in-process tier and reset the counters."""
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def _store(self, key: str, page: EncodedPage) -> None:
+        if len(page.data) > self.max_bytes:
+            return
+        previous = self._pages.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.data)
+        self._pages[key] = page
+        self._bytes += len(page.data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._pages.popitem(last=False)
+            self._bytes -= len(evicted.data)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _read_disk(self, key: str) -> EncodedPage | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            raw = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        header, _, data = raw.partition(b"\n")
+        try:
+            return EncodedPage(*json.loads(header), data)
+        except (ValueError, TypeError):
+            # A damaged entry is a miss; remove it so the page is written
+            # again once rendered.
+            try:
+                path.unlink()
+            except OSError:
+                return None
+            with self._lock:
+                self._disk_bytes -= len(raw)
+            return None
+
+    def _write_disk(self, key: str, page: EncodedPage) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        header = json.dumps(list(page[:-1])).encode()
+        # Write to a temporary file first so other workers never read a
+        # partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=_TEMP_SUFFIX)
+        with os.fdopen(fd, "wb") as f:
+            f.write(header + b"\n" + page.data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._disk_bytes += len(header) + 1 + len(page.data)
+            prune = self._disk_bytes > self.max_disk_bytes
+        if prune:
+            self._prune_disk()
+
+    def _disk_entries(self) -> list[tuple[float, int, Path]]:
+        """Return the mtime, size and path of each entry, skipping temp files."""
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.name.endswith(_TEMP_SUFFIX):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _prune_disk(self) -> None:
+        """Remove the least recently used entries until 90% of the limit."""
+        cutoff = time.time() - _TEMP_FILE_LIFETIME
+        for path in self.directory.glob(f"*/*{_TEMP_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+
+# Cache shared by the app's label exports. Set TCGLABELS_LABEL_CACHE_DIR to
+# share rendered labels between the worker processes on a host.
+label_cache = LabelCache(directory=os.environ.get("TCGLABELS_LABEL_CACHE_DIR"))
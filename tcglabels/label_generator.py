@@ -1,18 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
 import os
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from enum import Enum
+from functools import lru_cache
 from importlib.resources import files
 from io import BytesIO
+from itertools import accumulate, batched, chain
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator, NamedTuple
+
+from .label_cache import LabelCache, label_key
+from .metrics import registry, timed
+from .models import Card, CardBatch
+from .pdf_writer import EncodedPage, PdfWriter, encode_page
+from .sheet_layout import SheetLayout
+from .text_atlas import GlyphAtlas, text_cache
+from .vector_pdf import PlacedText, TextTile, VectorPdfWriter
+
+# Pillow is imported where labels are drawn, so the web app's pages and state
+# can import the label settings without loading it.
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
+
+# Resolved once at import instead of on every Font.path access.
+FONTS_DIR = Path(str(files("tcglabels"))).parent / "assets/fonts"
+
+# Printed resolution of LABEL_SIZES, in pixels per inch.
+LABEL_DPI = 300
 
-from PIL import Image, ImageDraw, ImageFont
+# Label sizes in pixels (width, height), keyed by their printed dimensions.
+LABEL_SIZES: dict[str, tuple[int, int]] = {
+    '1.2"x0.8"': (360, 240),
+    '1.5"x0.5"': (450, 150),
+    '2.0"x1.0"': (600, 300),
+    '2.25"x1.5"': (675, 450),
+}
 
-from .models import Card
+# Maximum number of (font, size) faces kept loaded per process. Lines shrunk
+# to fit use sizes between MIN_FONT_SCALE and the full size.
+FONT_CACHE_SIZE = 128
 
+# Smallest size a line of text is shrunk to before it is cut short, as a
+# fraction of the label's font size.
+MIN_FONT_SCALE = 0.75
 
-def truncate_string(s, max_length):
-    if len(s) > max_length:
-        return s[: max_length - 3] + "..."
-    return s
+# Appended to text cut short to fit on a label.
+ELLIPSIS = "..."
+
+# How render worker processes are started. The app calls into LabelGenerator
+# from a multi-threaded process, where forking could copy a lock held by
+# another thread into the worker.
+WORKER_START_METHOD = "forkserver"
+
+# Batches smaller than this are rendered serially; sending them to worker
+# processes costs more than it saves for them.
+PARALLEL_MIN_CARDS = 256
+
+# Resolution (pixels per inch) and JPEG quality of single label PDF pages.
+# Sheets are laid out at LABEL_DPI so labels print at their real size.
+PAGE_RESOLUTION = 100.0
+PAGE_QUALITY = 95
+
+# Part of every label cache key. Bump it when layout changes what a label
+# looks like, so pages cached on disk by older versions aren't reused.
+LAYOUT_VERSION = 2
 
 
 class Font(Enum):
@@ -22,8 +80,193 @@ class Font(Enum):
 
     @property
     def path(self):
-        package_dir = Path(str(files("tcglabels")))
-        return str(package_dir.parent / "assets/fonts" / self.value)
+        return str(FONTS_DIR / self.value)
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(font: Font, size: int) -> ImageFont.FreeTypeFont:
+    """Load a font face, reusing faces already loaded by this process.
+
+    The cache is shared by every LabelGenerator and is safe to use from
+    multiple threads.
+
+    Args:
+        font (Font): The font to load.
+        size (int): The font size in pixels.
+
+    Returns:
+        ImageFont.FreeTypeFont: The loaded font face.
+
+    """
+    from PIL import ImageFont
+
+    with timed("font_load"):
+        return ImageFont.truetype(font.path, size)
+
+
+class AdvanceTable:
+    """The advance widths of a font face's characters, measured once each.
+
+    Text width is the sum of its characters' advances, which is how Pillow's
+    basic layout measures it, so fitting text costs dictionary lookups rather
+    than a FreeType call per attempt.
+    """
+
+    def __init__(self, face: ImageFont.FreeTypeFont):
+        """Initialize the AdvanceTable.
+
+        Args:
+            face (ImageFont.FreeTypeFont): The face to measure.
+        """
+        self.face = face
+        self._advances: dict[str, float] = {}
+
+    def advance(self, char: str) -> float:
+        """Return the advance width of a character in pixels."""
+        width = self._advances.get(char)
+        if width is None:
+            width = self._advances[char] = self.face.getlength(char)
+        return width
+
+    def width(self, text: str) -> float:
+        """Return the width of a line of text in pixels."""
+        try:
+            return sum(map(self._advances.__getitem__, text))
+        except KeyError:
+            return sum(map(self.advance, text))
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def advance_table(font: Font, size: int) -> AdvanceTable:
+    """Return the advance table of a font face, shared like load_font's faces."""
+    return AdvanceTable(load_font(font, size))
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def glyph_atlas(font: Font, size: int, mode: str) -> GlyphAtlas:
+    """Return the glyph atlas of a font face, shared like load_font's faces."""
+    return GlyphAtlas(load_font(font, size), mode)
+
+
+def truncate_text(text: str, table: AdvanceTable, max_width: float) -> str:
+    """Cut text short with an ellipsis so it is at most max_width wide.
+
+    Args:
+        text (str): The text to cut.
+        table (AdvanceTable): Advances of the face the text is set in.
+        max_width (float): The available width in pixels.
+
+    Returns:
+        str: The text unchanged if it fits, otherwise its longest prefix
+            that fits followed by ELLIPSIS.
+
+    """
+    if table.width(text) <= max_width:
+        return text
+    widths = list(accumulate(map(table.advance, text)))
+    cut = bisect_right(widths, max_width - table.width(ELLIPSIS))
+    return text[:cut].rstrip() + ELLIPSIS
+
+
+def fit_text(
+    text: str, font: Font, size: int, max_width: float, min_size: int
+) -> tuple[str, int]:
+    """Fit a line of text into a width, shrinking it and then cutting it short.
+
+    The largest font size from min_size to size at which the whole text fits
+    is found by binary search. Text that doesn't fit even at min_size is
+    truncated at min_size.
+
+    Args:
+        text (str): The text to fit.
+        font (Font): The font the text is set in.
+        size (int): The preferred font size in pixels.
+        max_width (float): The available width in pixels.
+        min_size (int): The smallest font size to shrink to.
+
+    Returns:
+        tuple[str, int]: The text to draw and its font size.
+
+    """
+    if advance_table(font, size).width(text) <= max_width:
+        return text, size
+
+    low, high = min_size, size - 1
+    fitted = None
+    while low <= high:
+        middle = (low + high) // 2
+        if advance_table(font, middle).width(text) <= max_width:
+            fitted = middle
+            low = middle + 1
+        else:
+            high = middle - 1
+    if fitted is not None:
+        return text, fitted
+    return truncate_text(text, advance_table(font, min_size), max_width), min_size
+
+
+def font_height(size: tuple[int, int] | list[int]) -> int:
+    """Return the font size in pixels used for a label of the given size."""
+    return int(size[1] * 0.25)
+
+
+def preload_fonts(
+    sizes=LABEL_SIZES.values(),
+    fonts=tuple(Font),
+) -> int:
+    """Load the font faces for the given label sizes into the font cache.
+
+    Fonts that are not available on this host are skipped.
+
+    Args:
+        sizes (Iterable[tuple[int, int]], optional): Label sizes to preload.
+            Defaults to every size in LABEL_SIZES.
+        fonts (Iterable[Font], optional): Fonts to preload. Defaults to all.
+
+    Returns:
+        int: The number of faces loaded.
+
+    """
+    loaded = 0
+    for font in fonts:
+        for size in sizes:
+            try:
+                load_font(font, font_height(size))
+            except OSError:
+                break
+            loaded += 1
+    return loaded
+
+
+class OutputMode(Enum):
+    RASTER = "raster"  # Each label is an image
+    VECTOR = "vector"  # Each label is text set in an embedded font
+
+
+class RenderProfile(Enum):
+    """The image mode raster labels are drawn in, which sets how pages are encoded."""
+
+    RGB = "RGB"  # Color, JPEG encoded
+    GRAYSCALE = "L"  # Antialiased 8 bit gray, Flate encoded
+    BILEVEL = "1"  # Black and white, Flate encoded at 1 bit per pixel
+
+    @property
+    def mode(self) -> str:
+        return self.value
+
+
+class TextEngine(Enum):
+    FREETYPE = "freetype"  # Each line is rasterized by draw.text
+    ATLAS = "atlas"  # Lines are blitted from cached glyph and line bitmaps
+
+
+class TextLine(NamedTuple):
+    """A line of label text positioned by the top-left of its first glyph."""
+
+    text: str
+    x: int
+    y: int
+    font_size: int
 
 
 class LabelGenerator:
@@ -31,6 +274,13 @@ class LabelGenerator:
         self,
         size: tuple[int, int] | list[int],
         font: Font,
+        workers: int | None = None,
+        chunk_size: int = 64,
+        cache: LabelCache | None = None,
+        output_mode: OutputMode = OutputMode.RASTER,
+        sheet: SheetLayout | None = None,
+        profile: RenderProfile = RenderProfile.RGB,
+        text_engine: TextEngine = TextEngine.FREETYPE,
     ):
         """Initialize the LabelGenerator.
 
@@ -38,146 +288,647 @@ class LabelGenerator:
             size (tuple[int, int]): The size of the label in pixels (width, height).
             font (Font | None, optional): The font to use for the label.
                 Defaults to None.
+            workers (int | None, optional): Number of worker processes used to
+                render large batches. Defaults to None, which uses every CPU.
+                Use 1 to always render serially.
+            chunk_size (int, optional): Number of cards sent to a worker
+                process at a time. Defaults to 64.
+            cache (LabelCache | None, optional): Cache of encoded pages used
+                by the PDF methods. Defaults to None.
+            output_mode (OutputMode, optional): How the PDF methods draw
+                labels. Defaults to OutputMode.RASTER.
+            sheet (SheetLayout | None, optional): Sheet to tile labels onto in
+                the PDF methods. Defaults to None, which puts each label on
+                its own page.
+            profile (RenderProfile, optional): Image mode of raster labels.
+                Defaults to RenderProfile.RGB.
+            text_engine (TextEngine, optional): How raster labels draw text.
+                Both give the same labels, to within a few antialiased
+                pixels. Defaults to TextEngine.FREETYPE.
+
+        Raises:
+            ValueError: If the label does not fit on the sheet.
         """
-        self.size = size
+        self.size = tuple(size)
         self.font = font
+        self.workers = workers or os.process_cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.output_mode = output_mode
+        self.sheet = sheet
+        self.profile = profile
+        self.text_engine = text_engine
         self._starting_x = int(size[0] * 0.05)
+        self._max_width = self.size[0] - 2 * self._starting_x
+        if sheet is not None:
+            self._sheet_size = sheet.page_size(LABEL_DPI)
+            self._sheet_positions = sheet.positions(self.size, LABEL_DPI)
 
-    def generate_label(self, card: Card, output_path: str) -> None:
-        """Generate a label image and save it to the specified path.
+    def layout(self, card: Card) -> list[TextLine]:
+        """Lay out the lines of text of a card's label.
 
         Args:
-            card (Card): The card for which to generate the label.
-            output_path (str): The path where the label image will be saved.
+            card (Card): The card for which to lay out the label.
+
+        Returns:
+            list[TextLine]: The lines of the label, top to bottom.
+
+        """
+        # First line
+        line1 = self._fit_line(card.name, int(self.size[1] * 0.05))
+
+        # Second line
+        line2 = [str(card.number).upper(), str(card.rarity)]
+        if card.finish:
+            line2.append(str(card.finish))
+        line2 = self._fit_line(" ".join(line2), int(self.size[1] * 0.35))
+
+        # Third line
+        line3 = self._fit_line(card.set_name, int(self.size[1] * 0.65))
+
+        return [line1, line2, line3]
+
+    def _fit_line(self, text: str, y: int) -> TextLine:
+        fnt_height = font_height(self.size)
+        text, size = fit_text(
+            text,
+            self.font,
+            fnt_height,
+            self._max_width,
+            max(1, int(fnt_height * MIN_FONT_SCALE)),
+        )
+        return TextLine(text, self._starting_x, y, size)
+
+    def render_label(self, card: Card) -> Image.Image:
+        """Render a label image in memory, in the image mode of the profile.
+
+        Args:
+            card (Card): The card for which to render the label.
+
+        Returns:
+            Image.Image: The rendered label. The caller is responsible for
+                closing it.
 
         """
-        img = Image.new("RGB", size=self.size, color="white")
+        from PIL import Image
 
-        draw = ImageDraw.Draw(img)
+        img = Image.new(self.profile.mode, size=self.size, color="white")
+        self._draw_lines(img, self.layout(card))
 
-        # Load the font
-        font_height = int(self.size[1] * 0.25)
-        fnt = ImageFont.truetype(self.font.path, font_height)
+        return img
 
-        # Draw the first line of text
-        line1_y = int(self.size[1] * 0.05)
-        draw.text(
-            (self._starting_x, line1_y),
+    def render_sheet(self, cards: Iterable[Card]) -> Image.Image:
+        """Render one sheet of labels, drawing every tile onto the page directly.
+
+        Args:
+            cards (Iterable[Card]): At most one sheet's worth of cards.
+
+        Returns:
+            Image.Image: The rendered sheet. The caller is responsible for
+                closing it.
+
+        """
+        from PIL import Image
+
+        img = Image.new(self.profile.mode, size=self._sheet_size, color="white")
+        for card, (x, y) in zip(cards, self._sheet_positions):
+            lines = self.layout(card)
+            if self._fits(lines):
+                self._draw_lines(img, lines, origin=(x, y))
+            else:
+                # Text that would spill into the neighbouring tile is cut at
+                # the label edge, as on single label pages.
+                label = self.render_label(card)
+                img.paste(label, (x, y))
+                label.close()
+
+        return img
+
+    def _draw_lines(
+        self,
+        img: Image.Image,
+        lines: list[TextLine],
+        origin: tuple[int, int] = (0, 0),
+    ) -> None:
+        with timed("draw"):
+            if self.text_engine is TextEngine.ATLAS:
+                self._blit_lines(img, lines, origin)
+                return
+
+            from PIL import ImageDraw
+
+            draw = ImageDraw.Draw(img)
+            for line in lines:
+                draw.text(
+                    (origin[0] + line.x, origin[1] + line.y),
+                    line.text,
+                    font=load_font(self.font, line.font_size),
+                    fill="black",
+                    align="center",
+                )
+
+    def _blit_lines(
+        self,
+        img: Image.Image,
+        lines: list[TextLine],
+        origin: tuple[int, int],
+    ) -> None:
+        # Text is masked as draw.text masks it: black and white in "1"
+        # images, antialiased otherwise.
+        mode = "1" if img.mode == "1" else "L"
+        for line in lines:
+            text = text_cache.render(
+                (self.font, line.font_size, mode),
+                glyph_atlas(self.font, line.font_size, mode),
+                line.text,
+            )
+            if text is None:
+                continue
+            x = origin[0] + line.x + text.x
+            y = origin[1] + line.y + text.y
+            img.paste(
+                "black", (x, y, x + text.mask.width, y + text.mask.height), text.mask
+            )
+
+    def _fits(self, lines: list[TextLine]) -> bool:
+        return all(
+            line.x + advance_table(self.font, line.font_size).width(line.text)
+            <= self.size[0]
+            for line in lines
+        )
+
+    def render_labels(self, cards: Iterable[Card]) -> Iterator[Image.Image]:
+        """Render labels for the given cards, in the order of the cards.
+
+        Batches of at least PARALLEL_MIN_CARDS cards are split into chunks and
+        rendered by a pool of worker processes when more than one worker is
+        configured. Smaller batches are rendered in this process.
+
+        Args:
+            cards (Iterable[Card]): The cards for which to render labels.
+
+        Yields:
+            Image.Image: The rendered labels. The caller is responsible for
+                closing them.
+
+        """
+        from PIL import Image
+
+        for rendered in self._map_chunks("_render_image_chunk", cards):
+            for mode, size, data in rendered:
+                yield Image.frombytes(mode, size, data)
+
+    def cache_key(self, card: Card) -> str:
+        """Return the key identifying the page rendered for a card."""
+        return label_key(
             card.name,
-            font=fnt,
-            fill=(0, 0, 0),
-            align="center",
+            card.number,
+            card.rarity,
+            card.finish,
+            card.set_name,
+            self.size,
+            self.font.name,
+            PAGE_RESOLUTION,
+            PAGE_QUALITY,
+            LAYOUT_VERSION,
+            self.profile.name,
+            self.text_engine.name,
         )
 
-        # Draw the second line of text
-        line2 = [str(card.number).upper(), str(card.rarity)]
-        if card.finish:
-            line2.append(str(card.finish))
-        line2 = " ".join(line2)
-        line2 = truncate_string(line2, int(self.size[0] * 0.05))
-        line2_y = int(self.size[1] * 0.35)
-        draw.text(
-            (self._starting_x, line2_y),
-            line2,
-            font=fnt,
-            fill=(0, 0, 0),
-            align="center",
+    def pdf_key(self, cards: Iterable[Card]) -> str:
+        """Return a key identifying the PDF written for the given cards.
+
+        Args:
+            cards (Iterable[Card]): The cards, in the order they are written.
+                Iterated once.
+
+        Returns:
+            str: A hex digest of the cards and every setting that changes the
+                document.
+
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            label_key(
+                self.size,
+                self.font.name,
+                self.output_mode.value,
+                self.sheet,
+                PAGE_RESOLUTION,
+                PAGE_QUALITY,
+                LAYOUT_VERSION,
+                self.profile.name,
+                self.text_engine.name,
+            ).encode()
         )
+        for card in cards:
+            for part in (
+                card.number,
+                card.name,
+                card.set_name,
+                card.rarity,
+                card.finish,
+            ):
+                digest.update(part.encode())
+                digest.update(b"\x1f")
+            digest.update(b"\x1e")
+        return digest.hexdigest()
+
+    def render_pages(self, cards: Iterable[Card]) -> Iterator[EncodedPage]:
+        """Render and encode labels for the given cards, in order.
+
+        Cached pages are looked up in this process; only the misses are
+        rendered, in worker processes for large batches as in render_labels.
 
-        # Draw third line
-        line3 = truncate_string(card.set_name, int(self.size[0] * 0.05))
-        line3_y = int(self.size[1] * 0.65)
-        draw.text(
-            (self._starting_x, line3_y),
-            line3,
-            font=fnt,
-            fill=(0, 0, 0),
-            align="center",
+        Args:
+            cards (Iterable[Card]): The cards for which to render labels.
+
+        Yields:
+            EncodedPage: The encoded labels.
+
+        """
+        if self.cache is None:
+            for rendered in self._map_chunks("_render_page_chunk", cards):
+                yield from rendered
+            return
+
+        lookups = deque()
+        looked_up = 0
+
+        def misses() -> Iterator[tuple[Card, ...]]:
+            nonlocal looked_up
+            for chunk in batched(cards, self.chunk_size):
+                looked_up += len(chunk)
+                keys = [self.cache_key(card) for card in chunk]
+                pages = [self.cache.get(key) for key in keys]
+                lookups.append((keys, pages))
+                yield tuple(card for card, page in zip(chunk, pages) if page is None)
+
+        # Hits count towards the look-ahead too, so a mostly cached batch isn't
+        # read to the end before the first page comes out.
+        rendered_chunks = self._map_chunks(
+            "_render_page_chunk", misses(), chunked=True, seen=lambda: looked_up
         )
+        for rendered in rendered_chunks:
+            keys, pages = lookups.popleft()
+            rendered = iter(rendered)
+            for key, page in zip(keys, pages):
+                if page is None:
+                    page = next(rendered)
+                    self.cache.put(key, page)
+                yield page
+
+    def _map_chunks(
+        self,
+        method: str,
+        items: Iterable,
+        chunked: bool = False,
+        seen: Callable[[], int] | None = None,
+    ):
+        """Apply a chunk method of this class to chunks of items, in order.
+
+        Args:
+            method (str): Name of a method taking an iterable of cards and
+                returning a list with one result per card.
+            items (Iterable): The cards, or tuples of cards if chunked is set.
+            chunked (bool, optional): Whether items are already split into
+                chunks. Defaults to False.
+            seen (Callable[[], int] | None, optional): Returns how many cards
+                have been read to make the chunks so far, for the look-ahead
+                deciding whether to start worker processes. Defaults to
+                None, which counts the cards in the chunks.
+
+        Yields:
+            list: The result of the method for each chunk.
+
+        """
+        chunks = iter(items if chunked else batched(items, self.chunk_size))
+        head = []
+        head_cards = 0
+        while head_cards < PARALLEL_MIN_CARDS:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            head.append(chunk)
+            head_cards = seen() if seen is not None else head_cards + len(chunk)
+
+        if self.workers <= 1 or head_cards < PARALLEL_MIN_CARDS:
+            render_chunk = getattr(self, method)
+            for chunk in chain(head, chunks):
+                yield render_chunk(chunk)
+            return
+
+        executor = render_pool(self.workers)
+        settings = (self.size, self.font, self.sheet, self.profile, self.text_engine)
+        # Keep a bounded number of chunks in flight so results are reassembled
+        # in order without holding the whole batch.
+        pending = deque()
+        try:
+            for chunk in chain(head, chunks):
+                if chunk:
+                    # Columns pickle far smaller than a tuple of Cards.
+                    batch = CardBatch.from_cards(chunk)
+                    pending.append(
+                        executor.submit(_render_chunk, settings, method, batch)
+                    )
+                else:
+                    pending.append(None)
+                if len(pending) >= self.workers * 2:
+                    yield _chunk_result(pending.popleft())
+            while pending:
+                yield _chunk_result(pending.popleft())
+        except BrokenProcessPool:
+            _discard_render_pool(self.workers, executor)
+            raise
+        finally:
+            # The pool outlives this batch, so don't leave it work nobody
+            # will collect, e.g. when an import is cancelled.
+            for future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _render_image_chunk(self, cards: Iterable[Card]) -> list[tuple]:
+        rendered = []
+        for card in cards:
+            img = self.render_label(card)
+            rendered.append((img.mode, img.size, img.tobytes()))
+            img.close()
+        return rendered
+
+    def _render_page_chunk(self, cards: Iterable[Card]) -> list[EncodedPage]:
+        return [self._encode_label(card) for card in cards]
 
-        # Save the image
+    def _render_sheet_chunk(self, cards: Iterable[Card]) -> list[EncodedPage]:
+        img = self.render_sheet(cards)
+        with timed("encode"):
+            page = encode_page(img, quality=PAGE_QUALITY)
+        img.close()
+        return [page]
+
+    def _encode_label(self, card: Card) -> EncodedPage:
+        img = self.render_label(card)
+        with timed("encode"):
+            page = encode_page(img, quality=PAGE_QUALITY)
+        img.close()
+        return page
+
+    def generate_label(self, card: Card, output_path: str) -> None:
+        """Generate a label image and save it to the specified path.
+
+        Args:
+            card (Card): The card for which to generate the label.
+            output_path (str): The path where the label image will be saved.
+
+        """
+        img = self.render_label(card)
         img.save(output_path)
         img.close()
 
-    def generate_labels(self, cards: list[Card], output_dir: str) -> None:
+    def generate_labels(self, cards: list[Card], output_dir: str) -> list[str]:
         """Generate labels for a list of cards and save them to the specified directory.
 
+        Files are numbered in the order of the cards, so duplicate cards each
+        get their own file.
+
         Args:
             cards (list[Card]): List of Card objects to generate labels for.
             output_dir (str): Directory where the label images will be saved.
 
+        Returns:
+            list[str]: The paths of the saved images.
+
         """
         os.makedirs(output_dir, exist_ok=True)
-        for card in cards:
-            output_path = f"{output_dir}/label_{card.unique_id}.png"
-            self.generate_label(card, output_path)
+        paths = []
+        for i, (card, img) in enumerate(zip(cards, self.render_labels(cards))):
+            path = f"{output_dir}/label_{i:05d}_{card.unique_id}.png"
+            img.save(path)
+            img.close()
+            paths.append(path)
+        return paths
+
+    def write_labels_pdf(
+        self,
+        cards: Iterable[Card],
+        sink: BinaryIO,
+        on_page: Callable[[int], None] | None = None,
+    ) -> int:
+        """Stream a PDF of labels for the given cards to a file-like object.
+
+        Each label is encoded and written as soon as it is rendered, so memory
+        use does not depend on the number of cards. Labels are drawn as images
+        or as text depending on the output mode.
+
+        Args:
+            cards (Iterable[Card]): The cards to generate labels for. May be a
+                generator.
+            sink (BinaryIO): Where the PDF is written.
+            on_page (Callable[[int], None] | None, optional): Called with the
+                number of labels on each page once it is written. Defaults to
+                None.
+
+        Returns:
+            int: The number of pages written. Nothing is written to the sink
+                when there are no cards.
+
+        """
+        on_page = on_page or (lambda labels: None)
+        if self.output_mode is OutputMode.VECTOR:
+            return self._write_vector_pdf(cards, sink, on_page)
+
+        if self.sheet is not None:
+            # Sheets are rendered in order, a few ahead of the one being
+            # written, so their sizes are queued as they are read.
+            sheet_sizes = deque()
+
+            def sheets() -> Iterator[tuple[Card, ...]]:
+                for sheet_cards in batched(cards, len(self._sheet_positions)):
+                    sheet_sizes.append(len(sheet_cards))
+                    yield sheet_cards
+
+            rendered = self._map_chunks("_render_sheet_chunk", sheets(), chunked=True)
+            with PdfWriter(sink, resolution=LABEL_DPI) as pdf:
+                for pages in rendered:
+                    with timed("assemble"):
+                        pdf.add_page(pages[0])
+                    on_page(sheet_sizes.popleft())
+            return pdf.page_count
+
+        with PdfWriter(sink, resolution=PAGE_RESOLUTION) as pdf:
+            for page in self.render_pages(cards):
+                with timed("assemble"):
+                    pdf.add_page(page)
+                on_page(1)
+        return pdf.page_count
+
+    def _write_vector_pdf(
+        self,
+        cards: Iterable[Card],
+        sink: BinaryIO,
+        on_page: Callable[[int], None],
+    ) -> int:
+        if self.sheet is None:
+            with VectorPdfWriter(sink, self.font.path, PAGE_RESOLUTION) as pdf:
+                for card in cards:
+                    lines = self._place_text(self.layout(card))
+                    with timed("assemble"):
+                        pdf.add_page(self.size, lines)
+                    on_page(1)
+            return pdf.page_count
+
+        with VectorPdfWriter(sink, self.font.path, LABEL_DPI) as pdf:
+            for sheet_cards in batched(cards, len(self._sheet_positions)):
+                tiles = [
+                    TextTile(
+                        (x, y, *self.size),
+                        self._place_text(self.layout(card), origin=(x, y)),
+                    )
+                    for card, (x, y) in zip(sheet_cards, self._sheet_positions)
+                ]
+                with timed("assemble"):
+                    pdf.add_tiled_page(self._sheet_size, tiles)
+                on_page(len(tiles))
+        return pdf.page_count
+
+    def _place_text(
+        self,
+        lines: list[TextLine],
+        origin: tuple[int, int] = (0, 0),
+    ) -> list[PlacedText]:
+        """Convert text lines to baseline positions, as Pillow draws them."""
+        placed = []
+        for line in lines:
+            ascent, _ = load_font(self.font, line.font_size).getmetrics()
+            placed.append(
+                PlacedText(
+                    line.text,
+                    origin[0] + line.x,
+                    origin[1] + line.y + ascent,
+                    line.font_size,
+                )
+            )
+        return placed
 
     def generate_labels_pdf(
         self,
-        cards: list[Card],
+        cards: Iterable[Card],
         output_path: str = "labels.pdf",
     ) -> None:
         """Generate a PDF of labels for the given cards.
 
         Args:
-            cards (list[Card]): List of Card objects to generate labels for.
+            cards (Iterable[Card]): Card objects to generate labels for.
             output_path (str, optional): Path to save the generated PDF.
                 Defaults to "labels.pdf".
 
         """
-        images = []
-        for card in cards:
-            img_path = f"/tmp/label_{card.unique_id}.png"
-            self.generate_label(card, img_path)
-            img = Image.open(img_path).convert("RGB")
-            images.append(img)
-
-        if images:
-            images[0].save(
-                output_path,
-                save_all=True,
-                append_images=images[1:],
-                resolution=100.0,
-                quality=95,
-            )
-
-        for img in images:
-            img.close()
+        with open(output_path, "wb") as f:
+            page_count = self.write_labels_pdf(cards, f)
+        if page_count == 0:
+            os.remove(output_path)
 
     def generate_labels_pdf_bytes(
         self,
-        cards: list[Card],
+        cards: Iterable[Card],
     ) -> bytes:
         """Generate a PDF of labels for the given cards and return it as bytes.
 
         Args:
-            cards (list[Card]): List of Card objects to generate labels for.
+            cards (Iterable[Card]): Card objects to generate labels for.
 
         Returns:
             bytes: The generated PDF as bytes.
 
         """
+        pdf_bytes = BytesIO()
+        self.write_labels_pdf(cards, pdf_bytes)
+        return pdf_bytes.getvalue()
 
-        images = []
-        for card in cards:
-            img_path = f"/tmp/label_{card.unique_id}.png"
-            self.generate_label(card, img_path)
-            img = Image.open(img_path).convert("RGB")
-            images.append(img)
 
-        pdf_bytes = BytesIO()
-        if images:
-            images[0].save(
-                pdf_bytes,
-                format="PDF",
-                save_all=True,
-                append_images=images[1:],
-                resolution=100.0,
-                quality=95,
-            )
+# Render worker pools of this process, by number of workers. Each is started
+# by the first batch that needs it and kept, with its workers' fonts loaded,
+# until shutdown_render_pools.
+_render_pools: dict[int, ProcessPoolExecutor] = {}
+_render_pools_lock = threading.Lock()
 
-        for img in images:
-            img.close()
 
-        pdf_bytes.seek(0)
-        return pdf_bytes.read()
+def render_pool(workers: int) -> ProcessPoolExecutor:
+    """Return this process's pool of render workers, starting it if needed.
+
+    Every LabelGenerator with the same number of workers shares the pool, so
+    concurrent batches don't start more processes.
+
+    Args:
+        workers (int): The number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+
+    """
+    with _render_pools_lock:
+        pool = _render_pools.get(workers)
+        if pool is None:
+            pool = _render_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                initializer=_init_render_worker,
+            )
+        return pool
+
+
+def shutdown_render_pools() -> None:
+    """Stop the render worker processes started by this process."""
+    with _render_pools_lock:
+        pools = list(_render_pools.values())
+        _render_pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+def _discard_render_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    # A pool whose worker died can't be used again; the next batch starts a
+    # new one.
+    with _render_pools_lock:
+        if _render_pools.get(workers) is pool:
+            del _render_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_render_worker() -> None:
+    # Only the worker's own timings are sent back, whatever it started with.
+    registry.snapshot(reset=True)
+
+
+@lru_cache(maxsize=16)
+def _worker_generator(
+    size: tuple[int, int],
+    font: Font,
+    sheet: SheetLayout | None,
+    profile: RenderProfile,
+    text_engine: TextEngine,
+) -> LabelGenerator:
+    # One generator per combination of settings a worker is sent chunks for.
+    generator = LabelGenerator(
+        size=size,
+        font=font,
+        workers=1,
+        sheet=sheet,
+        profile=profile,
+        text_engine=text_engine,
+    )
+    preload_fonts([size], [font])
+    return generator
+
+
+def _render_chunk(settings: tuple, method: str, cards: CardBatch) -> tuple[list, dict]:
+    # The worker's timings go back with each chunk, for the parent's metrics.
+    rendered = getattr(_worker_generator(*settings), method)(cards)
+    return rendered, registry.snapshot(reset=True)
+
+
+def _chunk_result(future) -> list:
+    if future is None:
+        return []
+    rendered, metrics = future.result()
+    registry.merge(metrics)
+    return rendered
@@ -0,0 +1,327 @@
+import bisect
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+logger = logging.getLogger(__name__)
+
+# Only serve /metrics to clients on this host. Set to 0 when the scraper runs
+# elsewhere, e.g. in another container.
+METRICS_LOCAL_ONLY = os.environ.get("TCGLABELS_METRICS_LOCAL_ONLY", "1") != "0"
+
+# Histogram bucket upper bounds in seconds, from a single glyph run to a
+# large export.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], **extra) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    """A Prometheus counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self._lock:
+            values = dict(self._values)
+            if reset:
+                self._values.clear()
+        return values
+
+    def merge(self, values: dict) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> Iterator[str]:
+        for key, value in sorted(self.snapshot().items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {value:g}"
+
+
+class Histogram:
+    """A Prometheus histogram of durations in seconds, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label values: observations per bucket (the last one unbounded),
+        # their sum and their count.
+        self._values: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the time spent in the with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self._lock:
+            values = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            }
+            if reset:
+                self._values.clear()
+        return values
+
+    def merge(self, values: dict) -> None:
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                old_counts, old_total, old_count = self._values.get(
+                    key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+                )
+                self._values[key] = (
+                    [a + b for a, b in zip(old_counts, counts)],
+                    old_total + total,
+                    old_count + count,
+                )
+
+    def render(self) -> Iterator[str]:
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total, count) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, le=bound)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total:.6f}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Gauge:
+    """A Prometheus gauge read from a callback each time it is rendered.
+
+    The values describe the process rendering them, e.g. the size of a cache,
+    so they are left out of snapshots sent to other processes.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = labelnames
+
+    def snapshot(self, reset: bool = False) -> dict:
+        return {}
+
+    def merge(self, values: dict) -> None:
+        pass
+
+    def render(self) -> Iterator[str]:
+        for key, value in sorted(self.read().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+
+
+class MetricsRegistry:
+    """The metrics of a process, rendered in the Prometheus text format.
+
+    Worker processes record into their own registry; the parent merges in
+    their snapshots so /metrics covers work done anywhere.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def counter(
+        self, name: str, help: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple[str, ...] = ()
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+    ) -> Gauge:
+        return self._register(Gauge(name, help, read, labelnames))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict]:
+        """Return every metric's values, e.g. to send to another process.
+
+        Args:
+            reset (bool, optional): Whether to clear the values, so the next
+                snapshot only holds what was recorded after this one.
+                Defaults to False.
+
+        Returns:
+            dict[str, dict]: Values by metric name, for merge().
+
+        """
+        return {name: metric.snapshot(reset) for name, metric in self._metrics.items()}
+
+    def merge(self, snapshot: dict[str, dict]) -> None:
+        """Add the values of a snapshot from another registry to this one."""
+        for name, values in snapshot.items():
+            if values:
+                self._metrics[name].merge(values)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Metrics of this process.
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "tcglabels_stage_seconds",
+    "Time spent in each stage of searching, importing and rendering labels.",
+    ("stage",),
+)
+REQUEST_SECONDS = registry.histogram(
+    "tcglabels_request_seconds",
+    "Time taken by searches, imports and exports, end to end.",
+    ("kind",),
+)
+CARDS = registry.counter(
+    "tcglabels_cards",
+    "Cards returned by searches or read from imports.",
+    ("kind",),
+)
+OUTPUT_BYTES = registry.counter(
+    "tcglabels_output_bytes",
+    "Bytes of PDF returned by imports and exports.",
+    ("kind",),
+)
+CARD_FETCH_FAILURES = registry.counter(
+    "tcglabels_card_fetch_failures",
+    "Full-card requests to TCGdex that failed or timed out.",
+)
+
+
+def timed(stage: str):
+    """Return a context manager observing the time of a stage."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def log_request(kind: str, seconds: float, **fields) -> None:
+    """Record a finished request and log it as one JSON line.
+
+    Args:
+        kind (str): The kind of request, e.g. "search" or "export".
+        seconds (float): How long it took.
+        **fields: Details to log, e.g. card counts and output bytes. cards
+            and output_bytes are also added to their counters.
+
+    """
+    REQUEST_SECONDS.observe(seconds, kind=kind)
+    if fields.get("cards"):
+        CARDS.inc(fields["cards"], kind=kind)
+    if fields.get("output_bytes"):
+        OUTPUT_BYTES.inc(fields["output_bytes"], kind=kind)
+    logger.info(
+        json.dumps({"event": kind, "seconds": round(seconds, 6), **fields}),
+    )
+
+
+def _is_local(request: Request) -> bool:
+    if request.client is None:
+        return False
+    try:
+        return ipaddress.ip_address(request.client.host).is_loopback
+    except ValueError:
+        return request.client.host == "localhost"
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serve the metrics of this process to a Prometheus scraper."""
+    if METRICS_LOCAL_ONLY and not _is_local(request):
+        return PlainTextResponse("Forbidden\n", status_code=403)
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
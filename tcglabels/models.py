@@ -1,16 +1,99 @@
+import hashlib
+import sys
 from dataclasses import dataclass, field
-from uuid import uuid4
+from typing import Iterable, Iterator
 
 
-def generate_uuid() -> str:
-    return str(uuid4())
+def card_id(number: str, name: str, set_name: str, rarity: str, finish: str) -> str:
+    """Return an id derived from a card's fields, equal for identical cards."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (number, name, set_name, rarity, finish):
+        digest.update(part.encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Card:
     number: str
     name: str
     set_name: str
     rarity: str
     finish: str  # e.g., "Holofoil", "1st Edition", etc.
-    unique_id: str = field(default_factory=generate_uuid)
+    unique_id: str = field(default="", compare=False)
+
+    def __post_init__(self):
+        # Set names, rarities and finishes repeat across many cards, so share
+        # one copy of each.
+        object.__setattr__(self, "set_name", sys.intern(self.set_name))
+        object.__setattr__(self, "rarity", sys.intern(self.rarity))
+        object.__setattr__(self, "finish", sys.intern(self.finish))
+        if not self.unique_id:
+            object.__setattr__(
+                self,
+                "unique_id",
+                card_id(
+                    self.number, self.name, self.set_name, self.rarity, self.finish
+                ),
+            )
+
+
+class CardBatch:
+    """Cards stored column by column, for large imports and exports.
+
+    A batch holds one list per Card field instead of one object per card,
+    and iterates as Card objects. Repeated set names, rarities and finishes
+    are stored once.
+
+    Example:
+        batch = CardBatch()
+        batch.append("swsh3-136", "Charizard", "Darkness Ablaze", "Rare", "Holo")
+        generator.write_labels_pdf(batch, sink)
+
+    """
+
+    __slots__ = ("numbers", "names", "set_names", "rarities", "finishes")
+
+    def __init__(self):
+        self.numbers: list[str] = []
+        self.names: list[str] = []
+        self.set_names: list[str] = []
+        self.rarities: list[str] = []
+        self.finishes: list[str] = []
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Card]) -> "CardBatch":
+        batch = cls()
+        for card in cards:
+            batch.append(
+                card.number, card.name, card.set_name, card.rarity, card.finish
+            )
+        return batch
+
+    def append(
+        self, number: str, name: str, set_name: str, rarity: str, finish: str
+    ) -> None:
+        """Add a card to the end of the batch."""
+        self.numbers.append(number)
+        self.names.append(name)
+        self.set_names.append(sys.intern(set_name))
+        self.rarities.append(sys.intern(rarity))
+        self.finishes.append(sys.intern(finish))
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __getitem__(self, index: int) -> Card:
+        return Card(
+            self.numbers[index],
+            self.names[index],
+            self.set_names[index],
+            self.rarities[index],
+            self.finishes[index],
+        )
+
+    def __iter__(self) -> Iterator[Card]:
+        for fields in zip(
+            self.numbers, self.names, self.set_names, self.rarities, self.finishes
+        ):
+            yield Card(*fields)
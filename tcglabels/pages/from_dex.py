@@ -1,54 +1,125 @@
-import csv
-import uuid
+import asyncio
 
 import reflex as rx
 
+from ..import_jobs import ImportJob, ImportStage, import_jobs
+from ..label_cache import label_cache
 from ..label_generator import LabelGenerator
-from ..models import Card
-from ..state import LabelSettingsState
+from ..state import LabelSettingsState, download_artifact
 from ..template import template
 
+# Seconds between progress updates while an import job runs.
+IMPORT_POLL_INTERVAL = 0.25
+
 
 class DexImportState(rx.State):
     uploading: rx.Field[bool] = rx.field(default=False)
     progress: rx.Field[int] = rx.field(default=0)
+    job_id: rx.Field[str] = rx.field(default="")
+    import_stage: rx.Field[str] = rx.field(default="")
+    rows_parsed: rx.Field[int] = rx.field(default=0)
+    labels_rendered: rx.Field[int] = rx.field(default=0)
+    label_count: rx.Field[int] = rx.field(default=0)
 
     @rx.event
     async def handle_upload(self, files: list[rx.UploadFile]):
-        """Handle file upload and set uploaded state."""
-        # Process the uploaded files here (e.g., parse CSV, validate data)
-        all_cards = []
-        for file in files:
-            content = await file.read()
-            # Parse the CSV content
-            try:
-                decoded = content.decode("utf-8")
-            except UnicodeDecodeError:
-                try:
-                    decoded = content.decode("utf-16")
-                except UnicodeDecodeError:
-                    decoded = content.decode("latin-1")
-            reader = csv.DictReader(decoded.splitlines(), delimiter=";")
-            cards = []
-            for row in reader:
-                cards.append(
-                    Card(
-                        number=row.get("Id", ""),
-                        name=row.get("Name", ""),
-                        set_name=row.get("Set", ""),
-                        rarity=row.get("Rarity", ""),
-                        finish=row.get("Variant", ""),
-                    )
-                )
-            all_cards.extend(cards)
-
-        # Generate labels for all cards
+        """Start an import job for the uploaded files and follow its progress."""
         size = await self.get_var_value(LabelSettingsState.label_dimensions)
         font = await self.get_var_value(LabelSettingsState.font_enum)
-        label_gen = LabelGenerator(size=size, font=font)
-        label_data = label_gen.generate_labels_pdf_bytes(all_cards)
-        uuid_str = str(uuid.uuid4())
-        return rx.download(data=label_data, filename=f"labels_{uuid_str}.pdf")
+        output_mode = await self.get_var_value(LabelSettingsState.output_mode_enum)
+        sheet = await self.get_var_value(LabelSettingsState.sheet_layout)
+        profile = await self.get_var_value(LabelSettingsState.render_profile)
+        label_gen = LabelGenerator(
+            size=size,
+            font=font,
+            cache=label_cache,
+            output_mode=output_mode,
+            sheet=sheet,
+            profile=profile,
+        )
+        # Cancel an import still running from an earlier upload.
+        import_jobs.cancel(self.job_id)
+        job = ImportJob([file.file for file in files], label_gen)
+        import_jobs.add(job)
+        self._show_job(job)
+        return DexImportState.run_import(job.id)
+
+    @rx.event(background=True)
+    async def run_import(self, job_id: str):
+        """Run an import job on a worker thread, reporting its progress."""
+        job = import_jobs.get(job_id)
+        if job is None:
+            return
+        task = asyncio.create_task(asyncio.to_thread(job.run))
+        try:
+            while True:
+                await asyncio.wait({task}, timeout=IMPORT_POLL_INTERVAL)
+                done = task.done()
+                async with self:
+                    if self.job_id != job_id:
+                        # Superseded by a newer upload, which cancelled this.
+                        return
+                    self._show_job(job)
+                if done:
+                    break
+        finally:
+            if not task.done():
+                job.cancel()
+            import_jobs.pop(job_id)
+
+        if job.stage is ImportStage.FAILED:
+            return rx.toast.error(job.error)
+        if job.stage is not ImportStage.DONE:
+            return
+        events = []
+        if job.label_count:
+            events.append(download_artifact(job.artifact, f"labels_{job.id}.pdf"))
+        if job.errors:
+            lines = ", ".join(str(error.line) for error in job.errors[:10])
+            events.append(
+                rx.toast.warning(
+                    f"Skipped {len(job.errors)} malformed rows (lines {lines}"
+                    f"{', ...' if len(job.errors) > 10 else ''})"
+                )
+            )
+        return events
+
+    @rx.event
+    def cancel_import(self):
+        import_jobs.cancel(self.job_id)
+
+    def _show_job(self, job: ImportJob) -> None:
+        self.job_id = job.id
+        self.import_stage = job.stage.value
+        self.rows_parsed = job.rows_parsed
+        self.labels_rendered = job.labels_rendered
+        self.label_count = job.label_count
+
+    @rx.var
+    def importing(self) -> bool:
+        return self.import_stage in (
+            ImportStage.QUEUED.value,
+            ImportStage.PARSING.value,
+            ImportStage.RENDERING.value,
+        )
+
+    @rx.var
+    def import_status(self) -> str:
+        if self.import_stage == ImportStage.PARSING.value:
+            return f"Parsed {self.rows_parsed} rows"
+        if self.import_stage == ImportStage.RENDERING.value:
+            return f"Rendered {self.labels_rendered} of {self.label_count} labels"
+        if self.import_stage == ImportStage.DONE.value:
+            return f"Done: {self.label_count} labels"
+        return self.import_stage
+
+    @rx.var
+    def import_progress(self) -> int:
+        if self.import_stage == ImportStage.DONE.value:
+            return 100
+        if not self.label_count:
+            return 0
+        return self.labels_rendered * 100 // self.label_count
 
     @rx.event
     def handle_upload_progress(self, progress: dict):
@@ -75,6 +146,23 @@ def upload_form() -> rx.Component:
         ),
         rx.vstack(rx.foreach(rx.selected_files("file-upload"), rx.text)),
         rx.progress(value=DexImportState.progress, max=100),
+        rx.cond(
+            DexImportState.import_stage != "",
+            rx.hstack(
+                rx.text(DexImportState.import_status),
+                rx.progress(value=DexImportState.import_progress, max=100),
+                rx.cond(
+                    DexImportState.importing,
+                    rx.button(
+                        "Cancel Import",
+                        color_scheme="red",
+                        on_click=DexImportState.cancel_import,
+                    ),
+                ),
+                align="center",
+                width="100%",
+            ),
+        ),
         rx.cond(
             ~DexImportState.uploading,
             rx.button(
@@ -1,3 +1,7 @@
+import asyncio
+import re
+import time
+from contextlib import aclosing
 from typing import Sequence
 from uuid import uuid4
 
@@ -5,50 +9,193 @@ import reflex as rx
 from reflex.state import State
 from reflex.vars import BooleanVar
 
+from ..artifacts import artifact_store
+from ..label_cache import label_cache
 from ..label_generator import LabelGenerator
+from ..metrics import log_request
 from ..models import Card
-from ..state import LabelSettingsState
+from ..state import LabelSettingsState, download_artifact
 from ..tcg_search import search_cards
 from ..template import template
 
+# The running search of each client, so a new search can cancel it.
+_running_searches: dict[str, asyncio.Task] = {}
+
+# Minimum seconds between result table updates while a search streams in.
+# Each update re-sorts the results, so batches are grouped.
+SEARCH_UPDATE_INTERVAL = 0.25
+
+# Number of result rows sent to the client at a time.
+RESULTS_PAGE_SIZE = 50
+
+# Columns the results can be sorted by: card field by column label.
+SORT_FIELDS = {
+    "Name": "name",
+    "Set Name": "set_name",
+    "Rarity": "rarity",
+    "Number": "number",
+}
+
+
+def _natural_key(value: str) -> tuple[str | int, ...]:
+    """Return a sort key ordering the numbers in a string by value.
+
+    Card numbers then sort as "swsh3-9", "swsh3-10", "swsh3-136" rather
+    than by their characters.
+    """
+    parts = re.split(r"(\d+)", value.casefold())
+    # Splitting on a group alternates text and digits, starting with text,
+    # so keys only ever compare text with text and numbers with numbers.
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
+
+
+def _start_search(token: str, task: asyncio.Task) -> None:
+    """Record a client's new search, cancelling the one it supersedes."""
+    previous = _running_searches.get(token)
+    if previous is not None:
+        previous.cancel()
+    _running_searches[token] = task
+
+
+def _end_search(token: str, task: asyncio.Task) -> bool:
+    """Forget a client's search once it ends.
+
+    Returns:
+        bool: Whether the search was still the client's latest, rather than
+            one superseded by a newer search.
+
+    """
+    if _running_searches.get(token) is not task:
+        return False
+    del _running_searches[token]
+    return True
+
 
 class CardsTableState(State):
-    cards: rx.Field[Sequence[Card]] = rx.field(
-        default_factory=list
-    )  # List of card instances
-    selected_card_numbers: rx.Field[list[str]] = rx.field(
+    """Search results, kept on the server and shown one page at a time."""
+
+    # Every result, in sort order, and whether each is selected by unique id.
+    _cards: list[Card] = []
+    _selected: dict[str, bool] = {}
+
+    page_cards: rx.Field[Sequence[Card]] = rx.field(
         default_factory=list
-    )  # List of selected card ids (unique id)
+    )  # The results on the current page
+    page_selected: rx.Field[dict[str, bool]] = rx.field(
+        default_factory=dict
+    )  # Whether each card on the current page is selected, by unique id
+    page: rx.Field[int] = rx.field(default=0)
+    result_count: rx.Field[int] = rx.field(default=0)
+    selected_count: rx.Field[int] = rx.field(default=0)
+    sort_field: rx.Field[str] = rx.field(default="name")
+    sort_descending: rx.Field[bool] = rx.field(default=False)
     searching: rx.Field[bool] = rx.field(default=False)
+    generating: rx.Field[bool] = rx.field(default=False)
 
-    @rx.event
+    @rx.event(background=True)
     async def search_cards(self, form_data: dict) -> None:
-        """Search for cards based on form data and update the state."""
-        self.searching = True
-        results = await search_cards(form_data)
-        self.cards = results
-        self.selected_card_numbers = self.selected_card_numbers + [
-            card.unique_id for card in self.cards
-        ]
-        self.searching = False
+        """Search for cards based on form data and update the state.
+
+        Cards are shown as they arrive. Starting a new search cancels the
+        previous one, along with its pending requests.
+        """
+        token = self.router.session.client_token
+        task = asyncio.current_task()
+        _start_search(token, task)
+
+        try:
+            async with self:
+                self.searching = True
+                self._cards = []
+                self._selected = {}
+                self.page = 0
+                self._refresh()
+            pending = []
+            last_update = 0.0
+            async with aclosing(search_cards(form_data)) as batches:
+                async for batch in batches:
+                    pending += batch
+                    if time.monotonic() - last_update < SEARCH_UPDATE_INTERVAL:
+                        continue
+                    async with self:
+                        self._add_results(pending)
+                    pending = []
+                    last_update = time.monotonic()
+            if pending:
+                async with self:
+                    self._add_results(pending)
+        finally:
+            if _end_search(token, task):
+                async with self:
+                    self.searching = False
+
+    def _add_results(self, cards: list[Card]) -> None:
+        """Add cards to the results, selected."""
+        self._cards = self._sorted(self._cards + cards)
+        self._selected = self._selected | dict.fromkeys(
+            (card.unique_id for card in cards), True
+        )
+        self._refresh()
+
+    def _sorted(self, cards: list[Card]) -> list[Card]:
+        field = self.sort_field
+        return sorted(
+            cards,
+            key=(
+                (lambda card: _natural_key(card.number))
+                if field == "number"
+                else (lambda card: getattr(card, field).casefold())
+            ),
+            reverse=self.sort_descending,
+        )
+
+    def _refresh(self) -> None:
+        """Update the counters and the current page from the results."""
+        self.result_count = len(self._cards)
+        self.selected_count = sum(self._selected.values())
+        self.page = max(0, min(self.page, self.page_count - 1))
+        start = self.page * RESULTS_PAGE_SIZE
+        end = start + RESULTS_PAGE_SIZE
+        self.page_cards = self._cards[start:end]
+        self.page_selected = {
+            card.unique_id: self._selected[card.unique_id] for card in self.page_cards
+        }
+
+    @rx.var
+    def page_count(self) -> int:
+        return max(1, -(-self.result_count // RESULTS_PAGE_SIZE))
+
+    @rx.event
+    def set_page(self, page: int) -> None:
+        self.page = page
+        self._refresh()
+
+    @rx.event
+    def sort_by(self, column: str) -> None:
+        """Sort the results by a column, or reverse an existing sort."""
+        field = SORT_FIELDS[column]
+        if field == self.sort_field:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_field = field
+            self.sort_descending = False
+        self._cards = self._sorted(self._cards)
+        self.page = 0
+        self._refresh()
 
     @rx.event
     def toggle_all_selected(self) -> None:
         """Toggle selection state of all cards."""
-        if len(self.selected_card_numbers) == len(self.cards):
-            self.selected_card_numbers = []
-        else:
-            self.selected_card_numbers = [card.unique_id for card in self.cards]
+        self._selected = dict.fromkeys(self._selected, not self.all_selected)
+        self._refresh()
 
     @rx.var
     def all_selected(self) -> bool:
-        return (
-            len(self.selected_card_numbers) == len(self.cards) and len(self.cards) > 0
-        )
+        return 0 < self.selected_count == self.result_count
 
     @rx.var
     def any_selected(self) -> bool:
-        return len(self.selected_card_numbers) > 0
+        return self.selected_count > 0
 
     @rx.var
     def indeterminate(self) -> bool:
@@ -56,27 +203,69 @@ class CardsTableState(State):
 
     @rx.event
     def toggle_card_selected(self, card_number: str) -> None:
-        if card_number in self.selected_card_numbers:
-            self.selected_card_numbers.remove(card_number)
-        else:
-            self.selected_card_numbers.append(card_number)
-
-    @rx.var
-    def selected_count(self) -> int:
-        return len(self.selected_card_numbers)
+        # Only cards in the current results can be selected.
+        if card_number not in self._selected:
+            return
+        selected = not self._selected[card_number]
+        self._selected[card_number] = selected
+        self.selected_count += 1 if selected else -1
+        if card_number in self.page_selected:
+            self.page_selected[card_number] = selected
 
-    @rx.event
+    @rx.event(background=True)
     async def generate_labels(self):
-        """Generate labels for selected cards."""
-        selected_cards = [
-            card for card in self.cards if card.unique_id in self.selected_card_numbers
-        ]
-        size = await self.get_var_value(LabelSettingsState.label_dimensions)
-        font = await self.get_var_value(LabelSettingsState.font_enum)
-        generator = LabelGenerator(size=size, font=font)
-        guid = uuid4()
-        data = generator.generate_labels_pdf_bytes(cards=selected_cards)
-        return rx.download(data=data, filename=f"labels_{guid}.pdf")
+        """Generate labels for selected cards.
+
+        The PDF is rendered and stored on a worker thread, so the event loop
+        keeps serving other clients meanwhile.
+        """
+        async with self:
+            if self.generating:
+                return
+            self.generating = True
+            selected_cards = [
+                card for card in self._cards if self._selected[card.unique_id]
+            ]
+            size = await self.get_var_value(LabelSettingsState.label_dimensions)
+            font = await self.get_var_value(LabelSettingsState.font_enum)
+            output_mode = await self.get_var_value(LabelSettingsState.output_mode_enum)
+            sheet = await self.get_var_value(LabelSettingsState.sheet_layout)
+            profile = await self.get_var_value(LabelSettingsState.render_profile)
+        try:
+            generator = LabelGenerator(
+                size=size,
+                font=font,
+                cache=label_cache,
+                output_mode=output_mode,
+                sheet=sheet,
+                profile=profile,
+            )
+            guid = uuid4()
+            start = time.perf_counter()
+            # A repeat download of the same selection and settings reuses the
+            # stored PDF.
+            key = generator.pdf_key(selected_cards)
+            artifact = artifact_store.get(key)
+            reused = artifact is not None
+            if artifact is None:
+                artifact = await asyncio.to_thread(
+                    artifact_store.write,
+                    key,
+                    lambda sink: generator.write_labels_pdf(selected_cards, sink),
+                )
+            log_request(
+                "export",
+                time.perf_counter() - start,
+                cards=len(selected_cards),
+                output_bytes=artifact.size,
+                output_mode=output_mode.value,
+                profile=profile.name,
+                reused=reused,
+            )
+        finally:
+            async with self:
+                self.generating = False
+        return download_artifact(artifact, f"labels_{guid}.pdf")
 
 
 def search_form() -> rx.Component:
@@ -108,7 +297,7 @@ def dynamic_select_icon(selected: bool | BooleanVar):
 
 
 def show_card_row(card: Card) -> rx.Component:
-    selected = CardsTableState.selected_card_numbers.contains(card.unique_id)
+    selected = CardsTableState.page_selected[card.unique_id]
 
     return rx.table.row(
         rx.table.cell(
@@ -137,6 +326,51 @@ def select_all_checkbox() -> rx.Component:
     )
 
 
+def sortable_header(column: str) -> rx.Component:
+    sorted_by = CardsTableState.sort_field == SORT_FIELDS[column]
+    return rx.table.column_header_cell(
+        rx.hstack(
+            rx.text(column),
+            rx.cond(
+                sorted_by,
+                rx.cond(
+                    CardsTableState.sort_descending,
+                    rx.icon("arrow-down", size=14),
+                    rx.icon("arrow-up", size=14),
+                ),
+            ),
+            align="center",
+            spacing="1",
+        ),
+        on_click=CardsTableState.sort_by(column),
+        cursor="pointer",
+    )
+
+
+def pagination() -> rx.Component:
+    return rx.hstack(
+        rx.icon_button(
+            rx.icon("chevron-left"),
+            disabled=CardsTableState.page == 0,
+            on_click=CardsTableState.set_page(CardsTableState.page - 1),
+            aria_label="Previous Page",
+        ),
+        rx.text(
+            f"Page {CardsTableState.page + 1} of {CardsTableState.page_count}"
+            f" ({CardsTableState.result_count} cards)"
+        ),
+        rx.icon_button(
+            rx.icon("chevron-right"),
+            disabled=CardsTableState.page + 1 >= CardsTableState.page_count,
+            on_click=CardsTableState.set_page(CardsTableState.page + 1),
+            aria_label="Next Page",
+        ),
+        align="center",
+        justify="end",
+        width="100%",
+    )
+
+
 def search_results() -> rx.Component:
     # Search Results Component
     return rx.box(
@@ -144,18 +378,16 @@ def search_results() -> rx.Component:
             rx.table.header(
                 rx.table.row(
                     rx.table.column_header_cell(select_all_checkbox()),
-                    rx.table.column_header_cell("Name"),
-                    rx.table.column_header_cell("Set Name"),
-                    rx.table.column_header_cell("Rarity"),
-                    rx.table.column_header_cell("Number"),
+                    *(sortable_header(column) for column in SORT_FIELDS),
                     rx.table.column_header_cell("Finish"),
                 )
             ),
             rx.table.body(
-                rx.foreach(CardsTableState.cards, show_card_row),
+                rx.foreach(CardsTableState.page_cards, show_card_row),
             ),
             width="100%",
         ),
+        pagination(),
         margin_top="4",
         width="100%",
     )
@@ -187,9 +419,46 @@ def search_config() -> rx.Component:
                     ),
                     align="center",
                 ),
+                rx.hstack(
+                    rx.text("Output"),
+                    rx.select(
+                        ["Image", "Text"],
+                        name="output_mode",
+                        default_value="Image",
+                        width="200px",
+                        on_change=LabelSettingsState.set_output_mode,
+                    ),
+                    align="center",
+                ),
+                rx.hstack(
+                    rx.text("Colors"),
+                    rx.select(
+                        ["Color", "Grayscale", "Black & White"],
+                        name="colors",
+                        default_value="Color",
+                        width="200px",
+                        on_change=LabelSettingsState.set_colors,
+                    ),
+                    align="center",
+                ),
+                rx.hstack(
+                    rx.text("Sheet"),
+                    rx.select(
+                        ["None", "Letter", "A4"],
+                        name="sheet",
+                        default_value="None",
+                        width="200px",
+                        on_change=LabelSettingsState.set_sheet,
+                    ),
+                    align="center",
+                ),
                 rx.button(
-                    f"Generate Labels for {CardsTableState.selected_count} Cards",
-                    disabled=~CardsTableState.any_selected,
+                    rx.cond(
+                        CardsTableState.generating,
+                        "Generating...",
+                        f"Generate Labels for {CardsTableState.selected_count} Cards",
+                    ),
+                    disabled=~CardsTableState.any_selected | CardsTableState.generating,
                     color_scheme="green",
                     margin_bottom="4",
                     on_click=CardsTableState.generate_labels,
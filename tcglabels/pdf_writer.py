@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import zlib
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Object numbers reserved for the document catalog and the page tree, which
+# can only be written once every page is known.
+_CATALOG_ID = 1
+_PAGES_ID = 2
+
+# zlib level of Flate encoded pages. Level 9 saves a few percent on label
+# text at several times the cost.
+FLATE_LEVEL = 6
+
+
+class EncodedPage(NamedTuple):
+    """A label image encoded as a PDF image stream."""
+
+    width: int
+    height: int
+    color_space: str  # e.g. "DeviceRGB"
+    bits_per_component: int
+    filter: str  # e.g. "DCTDecode" or "FlateDecode"
+    data: bytes
+
+
+def encode_page(img: Image.Image, quality: int = 95) -> EncodedPage:
+    """Encode an image so it can be written as a PDF page.
+
+    Grayscale ("L") and black and white ("1") images are compressed
+    losslessly with Flate, which suits text far better than JPEG. Images in
+    any other mode are converted to RGB and saved as JPEG.
+
+    Args:
+        img (Image.Image): The image to encode.
+        quality (int, optional): JPEG quality. Defaults to 95.
+
+    Returns:
+        EncodedPage: The encoded image.
+
+    """
+    if img.mode in ("L", "1"):
+        # Pillow packs "1" images eight pixels to a byte with 0 as black,
+        # as PDF expects of a 1 bit DeviceGray image.
+        return EncodedPage(
+            width=img.width,
+            height=img.height,
+            color_space="DeviceGray",
+            bits_per_component=1 if img.mode == "1" else 8,
+            filter="FlateDecode",
+            data=zlib.compress(img.tobytes(), FLATE_LEVEL),
+        )
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return EncodedPage(
+        width=img.width,
+        height=img.height,
+        color_space="DeviceRGB",
+        bits_per_component=8,
+        filter="DCTDecode",
+        data=buffer.getvalue(),
+    )
+
+
+class PdfWriter:
+    """Write a PDF one page at a time to a binary file-like object.
+
+    Each page is written to the sink as soon as it is added, so memory use
+    does not grow with the page count beyond one cross-reference entry per
+    object.
+
+    Example:
+        with PdfWriter(sink) as pdf:
+            for img in images:
+                pdf.add_page(encode_page(img))
+
+    """
+
+    def __init__(self, sink: BinaryIO, resolution: float = 100.0):
+        """Initialize the PdfWriter.
+
+        Args:
+            sink (BinaryIO): Where the document is written.
+            resolution (float, optional): Pixels per inch of the page images.
+                Defaults to 100.0.
+        """
+        self._sink = sink
+        self._resolution = resolution
+        self._position = 0
+        self._offsets: dict[int, int] = {}
+        self._next_id = _PAGES_ID + 1
+        self._page_ids: list[int] = []
+        self._closed = False
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def add_page(self, page: EncodedPage) -> None:
+        """Write an encoded image as a page of the document.
+
+        Args:
+            page (EncodedPage): The page image.
+
+        """
+        image_id = self.write_object(
+            (
+                f"<< /Type /XObject /Subtype /Image /Width {page.width}"
+                f" /Height {page.height} /ColorSpace /{page.color_space}"
+                f" /BitsPerComponent {page.bits_per_component}"
+                f" /Filter /{page.filter} /Length {len(page.data)} >>"
+            ).encode(),
+            page.data,
+        )
+        width = self.to_points(page.width)
+        height = self.to_points(page.height)
+        self.add_content_page(
+            width,
+            height,
+            f"q {width:g} 0 0 {height:g} 0 0 cm /Im0 Do Q".encode(),
+            f"<< /XObject << /Im0 {image_id} 0 R >> >>",
+        )
+
+    def add_content_page(
+        self,
+        width: float,
+        height: float,
+        content: bytes,
+        resources: str,
+    ) -> None:
+        """Write a page with the given content stream.
+
+        Args:
+            width (float): Page width in points.
+            height (float): Page height in points.
+            content (bytes): The page content stream.
+            resources (str): The page resource dictionary.
+
+        """
+        content_id = self.write_object(
+            f"<< /Length {len(content)} >>".encode(), content
+        )
+        page_id = self.write_object(
+            (
+                f"<< /Type /Page /Parent {_PAGES_ID} 0 R"
+                f" /MediaBox [0 0 {width:g} {height:g}]"
+                f" /Resources {resources} /Contents {content_id} 0 R >>"
+            ).encode()
+        )
+        self._page_ids.append(page_id)
+
+    def to_points(self, pixels: float) -> float:
+        """Convert a length in image pixels to PDF points."""
+        return pixels * 72 / self._resolution
+
+    def reserve_object(self) -> int:
+        """Return an object number to be written later with write_object."""
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def close(self) -> None:
+        """Write the page tree, cross-reference table and trailer.
+
+        Nothing is written if no pages were added.
+        """
+        if self._closed or not self._page_ids:
+            return
+        self._closed = True
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self.write_object(
+            f"<< /Type /Pages /Kids [{kids}] /Count {self.page_count} >>".encode(),
+            object_id=_PAGES_ID,
+        )
+        self.write_object(
+            f"<< /Type /Catalog /Pages {_PAGES_ID} 0 R >>".encode(),
+            object_id=_CATALOG_ID,
+        )
+
+        xref_position = self._position
+        size = self._next_id
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        xref += [f"{self._offsets[i]:010d} 00000 n \n" for i in range(1, size)]
+        self._write("".join(xref).encode())
+        self._write(
+            (
+                f"trailer\n<< /Size {size} /Root {_CATALOG_ID} 0 R >>\n"
+                f"startxref\n{xref_position}\n%%EOF\n"
+            ).encode()
+        )
+
+    def __enter__(self) -> "PdfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+    def _write(self, data: bytes) -> None:
+        self._sink.write(data)
+        self._position += len(data)
+
+    def write_object(
+        self,
+        dictionary: bytes,
+        stream: bytes | None = None,
+        object_id: int | None = None,
+    ) -> int:
+        """Write an indirect object to the document.
+
+        Args:
+            dictionary (bytes): The object, or the stream dictionary.
+            stream (bytes | None, optional): Stream data. Defaults to None.
+            object_id (int | None, optional): A number from reserve_object.
+                Defaults to None, which allocates a new number.
+
+        Returns:
+            int: The object number.
+
+        """
+        if self._position == 0:
+            self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        if object_id is None:
+            object_id = self.reserve_object()
+        self._offsets[object_id] = self._position
+        self._write(f"{object_id} 0 obj\n".encode() + dictionary)
+        if stream is not None:
+            self._write(b"\nstream\n")
+            self._write(stream)
+            self._write(b"\nendstream")
+        self._write(b"\nendobj\n")
+        return object_id
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Sequence
+
+from .models import Card
+
+# Search fields that make up a cache key, in key order.
+SEARCH_FIELDS = ("name", "set_name", "rarity", "id")
+
+
+def search_key(form_data: dict) -> tuple[str, ...]:
+    """Return the cache key for a search.
+
+    Fields are stripped and case folded, so searches the API treats the same
+    way share one entry.
+
+    Args:
+        form_data (dict): The search fields.
+
+    Returns:
+        tuple[str, ...]: One normalized value per field in SEARCH_FIELDS.
+
+    """
+    return tuple(
+        (form_data.get(field) or "").strip().casefold() for field in SEARCH_FIELDS
+    )
+
+
+def search_fields(form_data: dict) -> dict[str, str]:
+    """Return the search fields normalized as in its cache key.
+
+    Searches are fetched with these fields, so every search sharing a key
+    gets the results of the same query.
+
+    Args:
+        form_data (dict): The search fields.
+
+    Returns:
+        dict[str, str]: Each field in SEARCH_FIELDS, stripped and case folded.
+
+    """
+    return dict(zip(SEARCH_FIELDS, search_key(form_data)))
+
+
+class _SharedSearch:
+    """The batches of an in-flight search, shared by everyone awaiting it."""
+
+    def __init__(self):
+        self.batches: list[list[Card]] = []
+        self.done = False
+        self.error: Exception | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SearchCache:
+    """A TTL cache of search results that coalesces concurrent searches.
+
+    Results are kept for ttl seconds, up to max_entries searches, evicting the
+    least recently used first. While a search is being fetched, identical
+    searches follow that fetch's batches instead of starting their own. The
+    fetch is cancelled once nobody is following it any more. Results missing
+    cards that failed to fetch are passed on but not cached.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        """Initialize the SearchCache.
+
+        Args:
+            max_entries (int, optional): Maximum number of cached searches.
+                Defaults to 256.
+            ttl (float, optional): Seconds a result stays fresh. Defaults to
+                300.0.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._results: OrderedDict[tuple[str, ...], tuple[float, list[Card]]] = (
+            OrderedDict()
+        )
+        self._in_flight: dict[tuple[str, ...], _SharedSearch] = {}
+
+    async def stream(
+        self,
+        form_data: dict,
+        fetch: Callable[[dict, list[str]], AsyncIterator[Sequence[Card]]],
+    ) -> AsyncIterator[list[Card]]:
+        """Yield the results of a search in batches, fetching them on a miss.
+
+        A cached result is yielded as one batch.
+
+        Args:
+            form_data (dict): The search fields.
+            fetch (Callable[[dict, list[str]], AsyncIterator[Sequence[Card]]]):
+                Runs the search upstream for the fields of search_fields,
+                yielding batches of cards. It appends the ids of matches it
+                could not fetch to the list it is passed. Failures are raised
+                to every caller following the search and are not cached.
+
+        Yields:
+            list[Card]: Batches of search results.
+
+        """
+        key = search_key(form_data)
+        entry = self._results.get(key)
+        if entry is not None:
+            expires, cards = entry
+            if expires > time.monotonic():
+                self._results.move_to_end(key)
+                self.hits += 1
+                yield list(cards)
+                return
+            del self._results[key]
+
+        search = self._in_flight.get(key)
+        if search is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            search = self._in_flight[key] = _SharedSearch()
+            search.task = asyncio.create_task(
+                self._fetch(key, search, form_data, fetch)
+            )
+
+        search.subscribers += 1
+        try:
+            index = 0
+            while True:
+                changed = search.changed
+                while index < len(search.batches):
+                    index += 1
+                    yield list(search.batches[index - 1])
+                if search.done:
+                    break
+                await changed.wait()
+            if search.error is not None:
+                raise search.error
+        finally:
+            search.subscribers -= 1
+            if not search.subscribers and not search.done:
+                # Forget the search now, not when its task gets to handle the
+                # cancellation, so a search starting meanwhile fetches anew
+                # instead of following this one's partial results.
+                self._forget(key, search)
+                search.task.cancel()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the cache counters, size and hit rate."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "entries": len(self._results),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop every cached result and reset the counters."""
+        self._results.clear()
+        self.hits = self.misses = self.coalesced = 0
+
+    async def _fetch(
+        self,
+        key: tuple[str, ...],
+        search: _SharedSearch,
+        form_data: dict,
+        fetch: Callable[[dict, list[str]], AsyncIterator[Sequence[Card]]],
+    ) -> None:
+        missing = []
+        try:
+            async for batch in fetch(search_fields(form_data), missing):
+                search.batches.append(list(batch))
+                search.notify()
+        except Exception as e:
+            search.error = e
+        else:
+            # A retry may find the missing cards, so it shouldn't be answered
+            # from this result.
+            if not missing:
+                self._store(key, [card for batch in search.batches for card in batch])
+        finally:
+            search.done = True
+            self._forget(key, search)
+            search.notify()
+
+    def _forget(self, key: tuple[str, ...], search: _SharedSearch) -> None:
+        if self._in_flight.get(key) is search:
+            del self._in_flight[key]
+
+    def _store(self, key: tuple[str, ...], cards: list[Card]) -> None:
+        self._results[key] = (time.monotonic() + self.ttl, cards)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+
+# Cache shared by the app's searches.
+search_cache = SearchCache()
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+
+# Paper sizes in inches (width, height).
+PAPER_SIZES: dict[str, tuple[float, float]] = {
+    "Letter": (8.5, 11.0),
+    "A4": (8.27, 11.69),
+}
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """A grid of label tiles on a sheet of paper.
+
+    Lengths are in inches. When rows or columns are not given, as many as fit
+    inside the margins are used.
+    """
+
+    paper: str = "Letter"
+    rows: int | None = None
+    columns: int | None = None
+    margin: tuple[float, float] = (0.25, 0.25)  # left, top
+    gutter: tuple[float, float] = (0.125, 0.125)  # between columns, rows
+
+    def page_size(self, dpi: int) -> tuple[int, int]:
+        """Return the sheet size in pixels (width, height)."""
+        width, height = PAPER_SIZES[self.paper]
+        return round(width * dpi), round(height * dpi)
+
+    def positions(self, label_size: tuple[int, int], dpi: int) -> list[tuple[int, int]]:
+        """Return the top-left corner of each tile in pixels, row by row.
+
+        Args:
+            label_size (tuple[int, int]): The label size in pixels.
+            dpi (int): The resolution of the label size, in pixels per inch.
+
+        Returns:
+            list[tuple[int, int]]: Tile positions on the sheet.
+
+        Raises:
+            ValueError: If not even one label fits on the sheet.
+
+        """
+        page_width, page_height = self.page_size(dpi)
+        margin_x, margin_y = (round(value * dpi) for value in self.margin)
+        gutter_x, gutter_y = (round(value * dpi) for value in self.gutter)
+        step_x = label_size[0] + gutter_x
+        step_y = label_size[1] + gutter_y
+
+        columns = self.columns
+        if columns is None:
+            columns = (page_width - 2 * margin_x + gutter_x) // step_x
+        rows = self.rows
+        if rows is None:
+            rows = (page_height - 2 * margin_y + gutter_y) // step_y
+        if (
+            columns < 1
+            or rows < 1
+            or margin_x + columns * step_x - gutter_x > page_width
+            or margin_y + rows * step_y - gutter_y > page_height
+        ):
+            raise ValueError(
+                f"{columns}x{rows} labels of {label_size[0]}x{label_size[1]}px"
+                f" do not fit on {self.paper} paper at {dpi} dpi"
+            )
+
+        return [
+            (margin_x + column * step_x, margin_y + row * step_y)
+            for row in range(rows)
+            for column in range(columns)
+        ]
+
+
+# Sheet layouts offered by the app, by paper name.
+SHEET_LAYOUTS: dict[str, SheetLayout] = {
+    paper: SheetLayout(paper=paper) for paper in PAPER_SIZES
+}
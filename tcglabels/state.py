@@ -1,21 +1,20 @@
 import reflex as rx
 
-from .label_generator import Font
+from .artifacts import Artifact, artifact_store
+from .label_generator import LABEL_SIZES, Font, OutputMode, RenderProfile
+from .sheet_layout import SHEET_LAYOUTS, SheetLayout
 
 
 class LabelSettingsState(rx.State):
     label_size: rx.Field[str] = rx.field(default='1.5"x0.5"')
     font: rx.Field[str] = rx.field(default="Arial")
+    output_mode: rx.Field[str] = rx.field(default="Image")
+    sheet: rx.Field[str] = rx.field(default="None")
+    colors: rx.Field[str] = rx.field(default="Color")
 
     @rx.var
     def label_dimensions(self) -> tuple[int, int]:
-        size_map = {
-            '1.2"x0.8"': (360, 240),
-            '1.5"x0.5"': (450, 150),
-            '2.0"x1.0"': (600, 300),
-            '2.25"x1.5"': (675, 450),
-        }
-        return size_map.get(
+        return LABEL_SIZES.get(
             self.label_size, (450, 150)
         )  # Default to Medium if not found
 
@@ -35,3 +34,58 @@ class LabelSettingsState(rx.State):
     @rx.event
     def set_font(self, font: str) -> None:
         self.font = font
+
+    @rx.var
+    def output_mode_enum(self) -> OutputMode:
+        output_mode_map = {
+            "Image": OutputMode.RASTER,
+            "Text": OutputMode.VECTOR,
+        }
+        return output_mode_map.get(self.output_mode, OutputMode.RASTER)
+
+    @rx.event
+    def set_output_mode(self, output_mode: str) -> None:
+        self.output_mode = output_mode
+
+    @rx.var
+    def sheet_layout(self) -> SheetLayout | None:
+        return SHEET_LAYOUTS.get(self.sheet)  # None prints one label per page
+
+    @rx.event
+    def set_sheet(self, sheet: str) -> None:
+        self.sheet = sheet
+
+    @rx.var
+    def render_profile(self) -> RenderProfile:
+        render_profile_map = {
+            "Color": RenderProfile.RGB,
+            "Grayscale": RenderProfile.GRAYSCALE,
+            "Black & White": RenderProfile.BILEVEL,
+        }
+        return render_profile_map.get(self.colors, RenderProfile.RGB)
+
+    @rx.event
+    def set_colors(self, colors: str) -> None:
+        self.colors = colors
+
+
+def download_artifact(artifact: Artifact, filename: str) -> rx.event.EventSpec:
+    """Return an event that downloads a stored file over a short-lived URL.
+
+    The file is served by the backend, over plain HTTP, instead of being sent
+    through the state websocket.
+
+    Args:
+        artifact (Artifact): The file to download.
+        filename (str): The name the browser saves the file as.
+
+    Returns:
+        rx.event.EventSpec: The download event.
+
+    """
+    url = rx.config.get_config().api_url + artifact_store.download_path(
+        artifact.name, filename
+    )
+    # The backend is on another origin than the frontend in development, so
+    # the URL is absolute, which rx.download only accepts as a Var.
+    return rx.download(url=rx.Var.create(url), filename=filename)
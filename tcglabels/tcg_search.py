@@ -1,14 +1,202 @@
-from typing import Sequence
+from __future__ import annotations
 
-from tcgdexsdk import Query, TCGdex
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import aclosing
+from typing import TYPE_CHECKING, AsyncIterator, Sequence
 
+from .metrics import CARD_FETCH_FAILURES, log_request, timed
 from .models import Card
+from .search_cache import SearchCache, search_cache, search_fields
 
+# The TCGdex SDK, its HTTP client and the catalog are imported by the first
+# search, or by the app's warmup, so importing the pages stays cheap.
+if TYPE_CHECKING:
+    from tcgdexsdk.models.Card import Card as TCGCard
+    from tcgdexsdk.models.CardResume import CardResume
+    from tcgdexsdk.models.subs import CardVariants
+
+    from .catalog import Catalog
+    from .tcgdex_client import TCGdexClient
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of full-card requests in flight for one search.
+FETCH_CONCURRENCY = 16
+
+# Seconds to wait for a single full-card request.
+FETCH_TIMEOUT = 10.0
+
+
+async def iter_full_cards(
+    client: TCGdexClient,
+    brief_cards: Sequence[CardResume],
+    concurrency: int = FETCH_CONCURRENCY,
+    timeout: float = FETCH_TIMEOUT,
+    failed: list[str] | None = None,
+) -> AsyncIterator[list[TCGCard]]:
+    """Fetch the full cards for a card list concurrently, in batches.
+
+    Each batch holds every card that arrived since the previous one. Cards
+    that fail or time out are logged and left out instead of failing the
+    whole list. Closing the iterator cancels the requests still pending.
+
+    Args:
+        client (TCGdexClient): The client to fetch with.
+        brief_cards (Sequence[CardResume]): The cards to fetch.
+        concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to FETCH_CONCURRENCY.
+        timeout (float, optional): Seconds to wait for each card, including
+            retries. Defaults to FETCH_TIMEOUT.
+        failed (list[str] | None, optional): The ids of the cards left out
+            are appended to it. Defaults to None.
+
+    Yields:
+        list[TCGCard]: Batches of fetched cards.
+
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(brief_card: CardResume) -> TCGCard | None:
+        async with semaphore:
+            try:
+                with timed("card_fetch"):
+                    return await asyncio.wait_for(
+                        client.get_card(brief_card.id), timeout
+                    )
+            except Exception as e:
+                logger.warning("Could not fetch card %s: %r", brief_card.id, e)
+                CARD_FETCH_FAILURES.inc()
+                if failed is not None:
+                    failed.append(brief_card.id)
+                return None
+
+    pending = {asyncio.create_task(fetch(card)) for card in brief_cards}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            cards = [task.result() for task in done]
+            if any(cards):
+                yield [card for card in cards if card is not None]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def fetch_full_cards(
+    client: TCGdexClient,
+    brief_cards: Sequence[CardResume],
+    concurrency: int = FETCH_CONCURRENCY,
+    timeout: float = FETCH_TIMEOUT,
+    failed: list[str] | None = None,
+) -> list[TCGCard]:
+    """Fetch the full cards for a card list concurrently.
+
+    See iter_full_cards; this collects its batches into one list, in the
+    order the cards arrived.
+    """
+    return [
+        card
+        async for batch in iter_full_cards(
+            client, brief_cards, concurrency, timeout, failed
+        )
+        for card in batch
+    ]
+
+
+async def search_cards(
+    form_data,
+    concurrency: int = FETCH_CONCURRENCY,
+    timeout: float = FETCH_TIMEOUT,
+    cache: SearchCache | None = search_cache,
+    client: TCGdexClient | None = None,
+) -> AsyncIterator[list[Card]]:
+    """Search for cards and expand them into one Card per variant.
+
+    Cards are yielded in batches as they arrive, so the first results can be
+    shown while the rest are fetched. Closing the iterator stops the
+    requests still pending.
+
+    Searches are answered from the local catalog when it holds a snapshot and
+    has matches. Otherwise they go to the TCGdex API, and the cards found are
+    added to the catalog. Results are cached, and identical searches made at
+    the same time share one upstream request.
+
+    Args:
+        form_data (dict): The name, set_name, rarity and id to search for.
+        concurrency (int, optional): Maximum number of full-card requests in
+            flight. Defaults to FETCH_CONCURRENCY.
+        timeout (float, optional): Seconds to wait for each full-card
+            request. Defaults to FETCH_TIMEOUT.
+        cache (SearchCache | None, optional): The result cache. Defaults to
+            the shared search_cache; None searches upstream every time.
+        client (TCGdexClient | None, optional): The API client. Defaults to
+            the shared client.
+
+    Yields:
+        list[Card]: Batches of matching cards.
+
+    """
+
+    from .tcgdex_client import shared_client
+
+    def fetch(fields: dict, missing: list[str]) -> AsyncIterator[list[Card]]:
+        return _search_cards(
+            fields, client or shared_client(), concurrency, timeout, missing
+        )
+
+    start = time.perf_counter()
+    cards = 0
+    completed = False
+    if cache is None:
+        batches = fetch(search_fields(form_data), [])
+    else:
+        batches = cache.stream(form_data, fetch)
+    try:
+        async with aclosing(batches):
+            async for batch in batches:
+                cards += len(batch)
+                yield batch
+        completed = True
+    finally:
+        log_request(
+            "search",
+            time.perf_counter() - start,
+            cards=cards,
+            completed=completed,
+        )
+
+
+async def _search_cards(
+    form_data: dict,
+    client: TCGdexClient,
+    concurrency: int,
+    timeout: float,
+    missing: list[str],
+) -> AsyncIterator[list[Card]]:
+    from tcgdexsdk import Query
+
+    from .catalog import shared_catalog
+
+    catalog = await asyncio.to_thread(shared_catalog)
+    if catalog is not None:
+        with timed("catalog_search"):
+            found = await asyncio.to_thread(catalog.search, form_data)
+        if found:
+            yield [
+                variant_card
+                for card in found
+                for variant_card in variant_cards(
+                    card.id, card.name, card.rarity, card.set_name, card.variants
+                )
+            ]
+            return
 
-async def search_cards(form_data) -> Sequence[Card]:
-    sdk = TCGdex()
     query = Query()
-    response = []
     if form_data.get("name"):
         query = query.contains("name", form_data["name"])
 
@@ -22,53 +210,68 @@ async def search_cards(form_data) -> Sequence[Card]:
         query = query.contains("id", form_data["id"])
 
     if len(query.params) == 0:
-        return []
+        return
 
-    response += await sdk.card.list(query)
+    with timed("search_list"):
+        response = await client.list_cards(query)
 
-    cards = [
-        card
-        for card in [await card.get_full_card() for card in response]
-        if card is not None
-    ]
-
-    # convert TCGCard to our Card model
-    # for each true variant, create a new card with the variant
-    # name appended to the card name
-    extended_cards = []
-    for card in cards:
-        card_variants = []
-        if card.variants.firstEdition:
-            card_variants.append("1stEd")
-        if card.variants.holo:
-            card_variants.append("Holo")
-        if card.variants.normal:
-            card_variants.append("Normal")
-        if card.variants.reverse:
-            card_variants.append("RevHolo")
-        if card.variants.wPromo:
-            card_variants.append("Promo")
-        temp_cards = [
-            Card(
-                number=card.id,
-                name=card.name,
-                rarity=card.rarity,
-                set_name=card.set.name,
-                finish=variant,
-            )
-            for variant in card_variants
-        ]
-        if len(temp_cards) > 0:
-            extended_cards += temp_cards
-        else:
-            extended_cards.append(
-                Card(
-                    number=card.id,
-                    name=card.name,
-                    rarity=card.rarity,
-                    set_name=card.set.name,
-                    finish="",
+    full_cards = iter_full_cards(client, response, concurrency, timeout, missing)
+    async with aclosing(full_cards):
+        async for cards in full_cards:
+            if catalog is not None:
+                await _add_to_catalog(catalog, cards)
+            yield [
+                variant_card
+                for card in cards
+                for variant_card in variant_cards(
+                    card.id, card.name, card.rarity, card.set.name, card.variants
                 )
-            )
+            ]
+
 
-    return extended_cards
+async def _add_to_catalog(catalog: Catalog, cards: list[TCGCard]) -> None:
+    """Write fetched cards through to the catalog, logging failures.
+
+    A catalog that can't be written, e.g. because another process holds its
+    lock, must not fail the search it is only caching for.
+    """
+    try:
+        with timed("catalog_write"):
+            await asyncio.to_thread(catalog.add_cards, cards)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Could not add %d cards to the catalog: %r", len(cards), e)
+
+
+def variant_cards(
+    number: str,
+    name: str,
+    rarity: str,
+    set_name: str,
+    variants: CardVariants,
+) -> list[Card]:
+    """Convert a TCGdex card to our Card model.
+
+    For each true variant, create a new card with the variant as its finish.
+    Cards without variants get a single card with no finish.
+    """
+    card_variants = []
+    if variants.firstEdition:
+        card_variants.append("1stEd")
+    if variants.holo:
+        card_variants.append("Holo")
+    if variants.normal:
+        card_variants.append("Normal")
+    if variants.reverse:
+        card_variants.append("RevHolo")
+    if variants.wPromo:
+        card_variants.append("Promo")
+    return [
+        Card(
+            number=number,
+            name=name,
+            rarity=rarity,
+            set_name=set_name,
+            finish=variant,
+        )
+        for variant in card_variants or [""]
+    ]
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+from tcgdexsdk import Query, TCGdex, __version__
+from tcgdexsdk.models.Card import Card as TCGCard
+from tcgdexsdk.models.CardResume import CardResume
+from tcgdexsdk.models.SetResume import SetResume
+from tcgdexsdk.utils import _from_dict
+
+logger = logging.getLogger(__name__)
+
+# API root, e.g. to point the app at a mirror or a local stub server.
+TCGDEX_ENDPOINT = os.environ.get("TCGLABELS_TCGDEX_ENDPOINT", TCGdex.endpoint)
+
+# Maximum number of connections the shared client keeps open.
+TCGDEX_POOL_SIZE = int(os.environ.get("TCGLABELS_TCGDEX_POOL_SIZE", "16"))
+
+# Responses worth retrying: rate limiting and server errors.
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TCGdexClient:
+    """An async TCGdex API client on a pooled, keep-alive HTTP connection.
+
+    Responses are converted to the TCGdex SDK's models. Failed requests are
+    retried with exponential backoff.
+
+    Example:
+        async with TCGdexClient() as client:
+            card = await client.get_card("swsh3-136")
+
+    """
+
+    def __init__(
+        self,
+        endpoint: str = TCGDEX_ENDPOINT,
+        language: str = "en",
+        pool_size: int = TCGDEX_POOL_SIZE,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.25,
+    ):
+        """Initialize the TCGdexClient.
+
+        Args:
+            endpoint (str, optional): The API root. Defaults to
+                TCGDEX_ENDPOINT.
+            language (str, optional): The card language. Defaults to "en".
+            pool_size (int, optional): Maximum number of open connections.
+                Defaults to TCGDEX_POOL_SIZE.
+            timeout (float, optional): Seconds to wait to connect and for
+                each read. Waiting for a free connection is not limited.
+                Defaults to 10.0.
+            retries (int, optional): Times a failed request is retried.
+                Defaults to 2.
+            backoff (float, optional): Seconds before the first retry,
+                doubled for each one after it. Defaults to 0.25.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        # The SDK instance the returned models refer back to.
+        self.sdk = TCGdex(language).setEndpoint(endpoint)
+        self._http = httpx.AsyncClient(
+            base_url=f"{endpoint}/{language}/",
+            headers={"User-Agent": f"@tcgdex/python-sdk@{__version__}"},
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            timeout=httpx.Timeout(timeout, pool=None),
+        )
+
+    async def list_cards(self, query: Query | None = None) -> list[CardResume]:
+        """Return the brief cards matching a query, or every card."""
+        cards = await self._get(f"cards{query.build() if query else ''}")
+        return [_from_dict(CardResume, card, self.sdk) for card in cards]
+
+    async def get_card(self, card_id: str) -> TCGCard:
+        """Return the full card with an id."""
+        return _from_dict(TCGCard, await self._get(f"cards/{card_id}"), self.sdk)
+
+    async def list_sets(self) -> list[SetResume]:
+        """Return every set."""
+        sets = await self._get("sets")
+        return [_from_dict(SetResume, card_set, self.sdk) for card_set in sets]
+
+    async def list_rarities(self) -> list[str]:
+        """Return the name of every rarity."""
+        return await self._get("rarities")
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "TCGdexClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _get(self, path: str):
+        url = path.replace(" ", "%20")
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._http.get(url)
+                if response.status_code not in _RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = httpx.HTTPStatusError(
+                    f"HTTP {response.status_code} for {response.url}",
+                    request=response.request,
+                    response=response,
+                )
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            delay = self.backoff * 2**attempt
+            logger.debug("Retrying %s in %.2f s: %r", url, delay, error)
+            await asyncio.sleep(delay)
+
+
+_shared_client: TCGdexClient | None = None
+
+
+def shared_client() -> TCGdexClient:
+    """Return the client shared by every search in this process."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = TCGdexClient()
+    return _shared_client
+
+
+@asynccontextmanager
+async def tcgdex_client_lifespan():
+    """Close the shared client when the app shuts down."""
+    global _shared_client
+    try:
+        yield
+    finally:
+        if _shared_client is not None:
+            await _shared_client.aclose()
+            _shared_client = None
@@ -1,7 +1,84 @@
 """Welcome to Reflex! This file outlines the steps to create a basic app."""
 
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
 import reflex as rx
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from . import IMPORT_STARTED
+from .artifacts import ARTIFACT_ROUTE, artifact_endpoint
+from .label_cache import label_cache
+from .label_generator import shutdown_render_pools
+from .metrics import metrics_endpoint, registry
+from .pages import from_dex, index, search  # noqa: F401 (registers the pages)
+from .search_cache import search_cache
+from .warmup import warmup
 
 # from rxconfig import config
 
-app = rx.App()
+# Reflex only configures its own logger, so log the app's request and warmup
+# lines, one JSON object each, to stderr.
+_logger = logging.getLogger("tcglabels")
+if not _logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(_log_handler)
+    _logger.setLevel(logging.INFO)
+
+# Export the counters and sizes of this worker's caches with its metrics.
+registry.gauge(
+    "tcglabels_label_cache",
+    "Lookups and size of this worker's cache of rendered labels.",
+    lambda: {(stat,): value for stat, value in label_cache.stats().items()},
+    ("stat",),
+)
+registry.gauge(
+    "tcglabels_search_cache",
+    "Lookups, size and hit rate of this worker's cache of search results.",
+    lambda: {(stat,): value for stat, value in search_cache.stats().items()},
+    ("stat",),
+)
+
+# Prometheus metrics of this worker, at /metrics on the backend, and the
+# downloads of generated PDFs.
+backend_api = Starlette(
+    routes=[
+        Route("/metrics", metrics_endpoint),
+        Route(f"{ARTIFACT_ROUTE}/{{name}}", artifact_endpoint, methods=["GET", "HEAD"]),
+    ]
+)
+
+app = rx.App(api_transformer=backend_api)
+
+# Load fonts and Pillow and connect to TCGdex before the worker takes traffic.
+app.register_lifespan_task(warmup, import_seconds=time.perf_counter() - IMPORT_STARTED)
+
+
+@asynccontextmanager
+async def close_tcgdex_client():
+    """Close the pooled TCGdex connections on shutdown."""
+    # Imported here, as the client imports the TCGdex SDK and httpx, which
+    # would otherwise count towards the app's import time.
+    from .tcgdex_client import tcgdex_client_lifespan
+
+    async with tcgdex_client_lifespan():
+        yield
+
+
+app.register_lifespan_task(close_tcgdex_client)
+
+
+@asynccontextmanager
+async def close_render_pools():
+    """Stop the render worker processes on shutdown."""
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(shutdown_render_pools)
+
+
+app.register_lifespan_task(close_render_pools)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple
+
+# Pillow is imported where glyphs are drawn, so importing this module is cheap.
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
+
+
+class TextMask(NamedTuple):
+    """The coverage of a glyph or a line of text, as drawn by draw.text.
+
+    x and y offset the mask from the point the text is drawn at.
+    """
+
+    mask: Image.Image
+    x: int
+    y: int
+
+
+class GlyphAtlas:
+    """Bitmaps of a font face's glyphs, each rasterized once, and lines built from them.
+
+    Lines are assembled from glyph bitmaps at Pillow's basic layout positions,
+    so building one costs a few blits instead of a FreeType render. That
+    matches draw.text except, at most, a few antialiased pixels where glyphs
+    overlap. Faces using the Raqm layout (kerning, ligatures) and black and
+    white text, whose glyph positions Pillow rounds per line, are rasterized
+    a whole line at a time instead.
+    """
+
+    def __init__(self, face: ImageFont.FreeTypeFont, mode: str = "L"):
+        """Initialize the GlyphAtlas.
+
+        Args:
+            face (ImageFont.FreeTypeFont): The face to rasterize.
+            mode (str, optional): Mask mode, "L" for antialiased text or "1"
+                for black and white. Defaults to "L".
+        """
+        from PIL import ImageFont
+
+        self.face = face
+        self.mode = mode
+        self._glyphs: dict[str, tuple[TextMask | None, int]] = {}
+        self._compose = mode == "L" and face.layout_engine == ImageFont.Layout.BASIC
+
+    def glyph(self, char: str) -> tuple[TextMask | None, int]:
+        """Return the bitmap of a character, None if it is blank, and its advance."""
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            glyph = self._glyphs[char] = (
+                self._rasterize(char),
+                int(self.face.getlength(char, self.mode)),
+            )
+        return glyph
+
+    def render(self, text: str) -> TextMask | None:
+        """Return the mask of a line of text, or None if it is blank."""
+        if not self._compose:
+            return self._rasterize(text)
+
+        placed = []
+        x = 0
+        for char in text:
+            glyph, advance = self.glyph(char)
+            if glyph is not None:
+                placed.append((glyph.mask, x + glyph.x, glyph.y))
+            x += advance
+        if not placed:
+            return None
+
+        from PIL import Image, ImageChops
+
+        left = min(x for _, x, _ in placed)
+        top = min(y for _, _, y in placed)
+        right = max(x + mask.width for mask, x, _ in placed)
+        bottom = max(y + mask.height for mask, _, y in placed)
+        line = Image.new("L", (right - left, bottom - top), 0)
+        for mask, x, y in placed:
+            box = (x - left, y - top, x - left + mask.width, y - top + mask.height)
+            # Overlapping glyphs keep the darker coverage, as FreeType's
+            # renderer does.
+            line.paste(ImageChops.lighter(line.crop(box), mask), box)
+        return TextMask(line, left, top)
+
+    def _rasterize(self, text: str) -> TextMask | None:
+        left, top, right, bottom = self.face.getbbox(text, self.mode)
+        if right <= left or bottom <= top:
+            return None
+
+        from PIL import Image, ImageDraw
+
+        mask = Image.new(self.mode, (right - left, bottom - top), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=self.face, fill=255)
+        if not mask.getbbox():
+            return None
+        return TextMask(mask, left, top)
+
+
+class TextCache:
+    """A cache of rendered lines of text, bounded by the size of their masks.
+
+    Set names, rarities and finishes repeat across a collection, so most of a
+    label's text is drawn from here.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """Initialize the TextCache.
+
+        Args:
+            max_bytes (int, optional): Size limit of the cached masks.
+                Defaults to 16 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._masks: OrderedDict[tuple, TextMask | None] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def render(self, key: tuple, atlas: GlyphAtlas, text: str) -> TextMask | None:
+        """Return the mask of a line of text, rendering it with atlas on a miss.
+
+        Args:
+            key (tuple): Identifies the face and mode of atlas.
+            atlas (GlyphAtlas): Renders the text on a miss.
+            text (str): The line of text.
+
+        Returns:
+            TextMask | None: The mask, or None if the text is blank.
+
+        """
+        key = (*key, text)
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return self._masks[key]
+            self.misses += 1
+
+        mask = atlas.render(text)
+        with self._lock:
+            if key not in self._masks:
+                self._masks[key] = mask
+                self._bytes += _mask_bytes(mask)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._masks.popitem(last=False)
+                    self._bytes -= _mask_bytes(evicted)
+        return mask
+
+    def clear(self) -> None:
+        """Drop every cached line and reset the counters."""
+        with self._lock:
+            self._masks.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+
+def _mask_bytes(mask: TextMask | None) -> int:
+    return mask.mask.width * mask.mask.height if mask is not None else 0
+
+
+# Lines of text drawn by LabelGenerator's atlas text engine in this process.
+text_cache = TextCache()
@@ -0,0 +1,221 @@
+import hashlib
+import zlib
+from itertools import batched
+from pathlib import Path
+from typing import BinaryIO, Iterable, NamedTuple
+
+from .font_subset import TrueTypeFont
+from .pdf_writer import PdfWriter
+
+# Most entries in one bfchar block of a ToUnicode CMap.
+_BFCHAR_BLOCK = 100
+
+
+class PlacedText(NamedTuple):
+    """A line of text positioned in image pixels from the top-left corner."""
+
+    text: str
+    x: float
+    baseline: float
+    font_size: float
+
+
+class TextTile(NamedTuple):
+    """Text clipped to a box (x, y, width, height) in image pixels."""
+
+    box: tuple[int, int, int, int]
+    lines: Iterable[PlacedText]
+
+
+class VectorPdfWriter:
+    """Write labels as PDF text drawn with an embedded subset of one font.
+
+    Pages are written as they are added. The font subset is embedded when the
+    writer is closed, once every character used by the document is known.
+
+    The font is embedded as a composite (Type0) font and text is written as
+    glyph ids, so any character the font has can be drawn, e.g. ♀, δ or ★.
+    A ToUnicode map keeps the text searchable and copyable.
+
+    Example:
+        with VectorPdfWriter(sink, font_path) as pdf:
+            pdf.add_page((450, 150), lines)
+
+    """
+
+    def __init__(self, sink: BinaryIO, font_path: str, resolution: float = 100.0):
+        """Initialize the VectorPdfWriter.
+
+        Args:
+            sink (BinaryIO): Where the document is written.
+            font_path (str): Path of the TrueType font to embed.
+            resolution (float, optional): Pixels per inch of the label
+                coordinates. Defaults to 100.0.
+        """
+        self._pdf = PdfWriter(sink, resolution=resolution)
+        self._font = TrueTypeFont.from_path(font_path)
+        self._font_name = Path(font_path).stem.replace(" ", "")
+        self._font_id: int | None = None
+        # The character drawn with each glyph, for the ToUnicode map.
+        self._glyphs: dict[int, str] = {}
+
+    @property
+    def page_count(self) -> int:
+        return self._pdf.page_count
+
+    def add_page(self, size: tuple[int, int], lines: Iterable[PlacedText]) -> None:
+        """Write a page containing lines of text.
+
+        Args:
+            size (tuple[int, int]): The page size in pixels (width, height).
+            lines (Iterable[PlacedText]): The text to draw.
+
+        """
+        self._add_page(size, [self._text(size, lines)])
+
+    def add_tiled_page(self, size: tuple[int, int], tiles: Iterable[TextTile]) -> None:
+        """Write a page of text tiles, each clipped to its own box.
+
+        Args:
+            size (tuple[int, int]): The page size in pixels (width, height).
+            tiles (Iterable[TextTile]): The tiles to draw.
+
+        """
+        content = []
+        for tile in tiles:
+            x, y, width, height = (self._pdf.to_points(value) for value in tile.box)
+            bottom = self._pdf.to_points(size[1]) - y - height
+            content += [
+                f"q {x:g} {bottom:g} {width:g} {height:g} re W n".encode(),
+                self._text(size, tile.lines),
+                b"Q",
+            ]
+        self._add_page(size, content)
+
+    def _text(self, size: tuple[int, int], lines: Iterable[PlacedText]) -> bytes:
+        height = self._pdf.to_points(size[1])
+        content = [b"BT"]
+        for line in lines:
+            encoded = bytearray()
+            for char in line.text:
+                glyph_id = self._font.glyph_id(char)
+                self._glyphs.setdefault(glyph_id, char)
+                encoded += glyph_id.to_bytes(2)
+            content.append(
+                (
+                    f"/F1 {self._pdf.to_points(line.font_size):g} Tf"
+                    f" 1 0 0 1 {self._pdf.to_points(line.x):g}"
+                    f" {height - self._pdf.to_points(line.baseline):g} Tm"
+                    f" <{encoded.hex()}> Tj"
+                ).encode()
+            )
+        content.append(b"ET")
+        return b"\n".join(content)
+
+    def _add_page(self, size: tuple[int, int], content: list[bytes]) -> None:
+        if self._font_id is None:
+            self._font_id = self._pdf.reserve_object()
+        self._pdf.add_content_page(
+            self._pdf.to_points(size[0]),
+            self._pdf.to_points(size[1]),
+            b"\n".join(content),
+            f"<< /Font << /F1 {self._font_id} 0 R >> >>",
+        )
+
+    def close(self) -> None:
+        """Embed the font subset and finish the document."""
+        if self._font_id is not None:
+            self._write_font()
+            self._font_id = None
+        self._pdf.close()
+
+    def __enter__(self) -> "VectorPdfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+
+    def _write_font(self) -> None:
+        font = self._font
+        chars = sorted(self._glyphs.values())
+        subset = font.subset(chars)
+        # Subset fonts are named with a tag derived from their glyphs.
+        digest = hashlib.sha1("".join(chars).encode()).digest()
+        tag = "".join(chr(ord("A") + byte % 26) for byte in digest[:6])
+        name = f"{tag}+{self._font_name}"
+
+        compressed = zlib.compress(subset)
+        file_id = self._pdf.write_object(
+            (
+                f"<< /Length {len(compressed)} /Length1 {len(subset)}"
+                " /Filter /FlateDecode >>"
+            ).encode(),
+            compressed,
+        )
+        x_min, y_min, x_max, y_max = (font.scale(value) for value in font.bbox)
+        descriptor_id = self._pdf.write_object(
+            (
+                f"<< /Type /FontDescriptor /FontName /{name} /Flags 32"
+                f" /FontBBox [{x_min} {y_min} {x_max} {y_max}] /ItalicAngle 0"
+                f" /Ascent {font.scale(font.ascent)}"
+                f" /Descent {font.scale(font.descent)}"
+                f" /CapHeight {font.scale(font.cap_height)} /StemV 80"
+                f" /FontFile2 {file_id} 0 R >>"
+            ).encode()
+        )
+
+        # The subset keeps the font's glyph ids, so they are used as CIDs.
+        widths = " ".join(
+            f"{glyph_id} [{font.scale(font.advance(glyph_id))}]"
+            for glyph_id in sorted(self._glyphs)
+        )
+        cid_font_id = self._pdf.write_object(
+            (
+                f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{name}"
+                " /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity)"
+                f" /Supplement 0 >> /FontDescriptor {descriptor_id} 0 R"
+                f" /W [{widths}] /CIDToGIDMap /Identity >>"
+            ).encode()
+        )
+        to_unicode = zlib.compress(self._to_unicode())
+        to_unicode_id = self._pdf.write_object(
+            f"<< /Length {len(to_unicode)} /Filter /FlateDecode >>".encode(),
+            to_unicode,
+        )
+        self._pdf.write_object(
+            (
+                f"<< /Type /Font /Subtype /Type0 /BaseFont /{name}"
+                f" /Encoding /Identity-H /DescendantFonts [{cid_font_id} 0 R]"
+                f" /ToUnicode {to_unicode_id} 0 R >>"
+            ).encode(),
+            object_id=self._font_id,
+        )
+
+    def _to_unicode(self) -> bytes:
+        """Return a CMap from the glyph ids used to the characters they draw."""
+        entries = [
+            f"<{glyph_id:04x}> <{char.encode('utf-16-be').hex()}>"
+            for glyph_id, char in sorted(self._glyphs.items())
+            if glyph_id != 0
+        ]
+        lines = [
+            "/CIDInit /ProcSet findresource begin",
+            "12 dict begin",
+            "begincmap",
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+            "/CMapName /Adobe-Identity-UCS def",
+            "/CMapType 2 def",
+            "1 begincodespacerange",
+            "<0000> <ffff>",
+            "endcodespacerange",
+        ]
+        for block in batched(entries, _BFCHAR_BLOCK):
+            lines += [f"{len(block)} beginbfchar", *block, "endbfchar"]
+        lines += [
+            "endcmap",
+            "CMapName currentdict /CMap defineresource pop",
+            "end",
+            "end",
+        ]
+        return "\n".join(lines).encode()
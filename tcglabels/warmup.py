@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from .label_generator import LABEL_SIZES, Font, LabelGenerator, preload_fonts
+from .metrics import STAGE_SECONDS, timed
+from .models import Card
+from .pdf_writer import encode_page
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for TCGdex while warming up. A worker that can't reach it
+# still starts; its first search connects instead.
+WARMUP_TIMEOUT = 5.0
+
+# Rendered once per label size to load Pillow's drawing and encoding code.
+WARMUP_CARD = Card(
+    number="swsh3-136",
+    name="Furret",
+    set_name="Darkness Ablaze",
+    rarity="Uncommon",
+    finish="Holo",
+)
+
+
+def warm_renderer() -> int:
+    """Load the font faces of every label size and font the settings offer.
+
+    A label of each size is also rendered and encoded, which imports Pillow
+    and its JPEG encoder.
+
+    Returns:
+        int: The number of font faces loaded.
+
+    """
+    with timed("warmup_render"):
+        faces = preload_fonts(LABEL_SIZES.values(), tuple(Font))
+        for size in LABEL_SIZES.values():
+            img = LabelGenerator(size=size, font=Font.OPENSANS, workers=1).render_label(
+                WARMUP_CARD
+            )
+            encode_page(img)
+            img.close()
+    return faces
+
+
+async def warm_tcgdex(timeout: float = WARMUP_TIMEOUT) -> bool:
+    """Open the shared TCGdex client's first connection and load the catalog.
+
+    Returns:
+        bool: Whether TCGdex answered within the timeout.
+
+    """
+    with timed("warmup_tcgdex"):
+        from .catalog import shared_catalog
+        from .tcgdex_client import shared_client
+
+        await asyncio.to_thread(shared_catalog)
+        try:
+            await asyncio.wait_for(shared_client().list_rarities(), timeout)
+        except Exception as e:
+            logger.warning("Could not reach TCGdex during warmup: %r", e)
+            return False
+    return True
+
+
+@asynccontextmanager
+async def warmup(import_seconds: float | None = None):
+    """Warm this worker up before it takes traffic, and report how long it took.
+
+    Registered as a lifespan task, this runs before the server accepts
+    requests, so the first searches and exports don't pay for loading fonts,
+    Pillow or the TCGdex SDK, or for connecting to TCGdex.
+
+    Args:
+        import_seconds (float | None, optional): How long importing the app
+            took, to report with the warmup time. Defaults to None.
+
+    """
+    start = time.perf_counter()
+    faces, reachable = await asyncio.gather(
+        asyncio.to_thread(warm_renderer), warm_tcgdex()
+    )
+    seconds = time.perf_counter() - start
+    STAGE_SECONDS.observe(seconds, stage="warmup")
+    if import_seconds is not None:
+        STAGE_SECONDS.observe(import_seconds, stage="import")
+    logger.info(
+        json.dumps(
+            {
+                "event": "warmup",
+                "seconds": round(seconds, 6),
+                "import_seconds": (
+                    round(import_seconds, 6) if import_seconds is not None else None
+                ),
+                "font_faces": faces,
+                "tcgdex": reachable,
+            }
+        )
+    )
+    yield
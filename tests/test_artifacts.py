@@ -0,0 +1,153 @@
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from tcglabels import artifacts
+from tcglabels.artifacts import ARTIFACT_ROUTE, ArtifactStore, artifact_endpoint
+
+CONTENT = bytes(range(256)) * 40
+KEY = "ab" * 32
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ArtifactStore(tmp_path, ttl=60.0, secret=b"secret")
+    monkeypatch.setattr(artifacts, "artifact_store", store)
+    return store
+
+
+@pytest.fixture
+def client(store):
+    app = Starlette(
+        routes=[Route(ARTIFACT_ROUTE + "/{name}", artifact_endpoint)],
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+def write(store: ArtifactStore, content: bytes = CONTENT, key: str = KEY):
+    return store.write(key, lambda sink: sink.write(content))
+
+
+def test_write_names_files_by_content(store, tmp_path):
+    artifact = write(store)
+
+    assert artifact.size == len(CONTENT)
+    assert (tmp_path / artifact.name).read_bytes() == CONTENT
+    assert store.get(KEY) == artifact
+    assert store.get("cd" * 32) is None
+    assert write(store, key="cd" * 32) == artifact
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_writes_store_nothing(store, tmp_path):
+    def fail(sink):
+        sink.write(b"partial")
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        store.write(KEY, fail)
+
+    assert store.get(KEY) is None
+    assert not list(tmp_path.glob("*.*"))
+
+
+def test_signatures_bind_name_filename_and_expiry(store, tmp_path):
+    name = write(store).name
+    query = parse_qs(urlsplit(store.download_path(name, "labels.pdf")).query)
+    expires, signature = int(query["expires"][0]), query["signature"][0]
+
+    assert store.verify(name, "labels.pdf", expires, signature)
+    assert not store.verify(name, "other.pdf", expires, signature)
+    assert not store.verify(name, "labels.pdf", expires + 1, signature)
+    assert not store.verify("0" * 64 + ".pdf", "labels.pdf", expires, signature)
+    other = ArtifactStore(tmp_path, secret=b"other")
+    assert not other.verify(name, "labels.pdf", expires, signature)
+
+
+def test_download(store, client):
+    name = write(store).name
+
+    response = client.get(store.download_path(name, "labels.pdf"))
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "application/pdf"
+    assert 'filename="labels.pdf"' in response.headers["content-disposition"]
+
+
+def test_download_resumes_from_a_range(store, client):
+    name = write(store).name
+
+    response = client.get(
+        store.download_path(name, "labels.pdf"), headers={"Range": "bytes=1000-"}
+    )
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[1000:]
+    assert response.headers["content-range"] == (
+        f"bytes 1000-{len(CONTENT) - 1}/{len(CONTENT)}"
+    )
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        lambda url: url.replace("filename=labels.pdf", "filename=other.pdf"),
+        lambda url: url.replace("signature=", "signature=0"),
+        lambda url: url.split("?")[0],
+        lambda url: url.replace("expires=", "expires=x"),
+    ],
+    ids=["filename", "signature", "no-query", "bad-expires"],
+)
+def test_tampered_links_are_forbidden(store, client, tamper):
+    name = write(store).name
+
+    response = client.get(tamper(store.download_path(name, "labels.pdf")))
+
+    assert response.status_code == 403
+
+
+def test_expired_links_are_gone(store, client):
+    name = write(store).name
+
+    response = client.get(store.download_path(name, "labels.pdf", lifetime=-1))
+
+    assert response.status_code == 410
+
+
+def test_removed_files_are_not_found(store, client, tmp_path):
+    name = write(store).name
+    (tmp_path / name).unlink()
+
+    response = client.get(store.download_path(name, "labels.pdf"))
+
+    assert response.status_code == 404
+
+
+def test_cleanup_removes_unused_files(store, tmp_path):
+    old = write(store, b"old", key="01" * 32)
+    new = write(store, b"new", key="02" * 32)
+    past = time.time() - store.ttl - 1
+    for path in (tmp_path / old.name, tmp_path / "requests" / ("01" * 32)):
+        os.utime(path, (past, past))
+
+    assert store.cleanup() == 1
+
+    assert store.get("01" * 32) is None
+    assert store.get("02" * 32) == new
+    assert store.path(old.name) is None
+
+
+def test_downloads_keep_files(store, client, tmp_path):
+    name = write(store).name
+    past = time.time() - store.ttl - 1
+    os.utime(tmp_path / name, (past, past))
+
+    assert client.get(store.download_path(name, "labels.pdf")).status_code == 200
+    assert store.cleanup() == 0
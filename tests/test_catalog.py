@@ -0,0 +1,163 @@
+import asyncio
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from tcglabels import catalog as catalog_module
+from tcglabels.catalog import Catalog, open_catalog
+
+FIXTURE = Path(__file__).parent / "fixtures" / "cards.json"
+
+
+@pytest.fixture
+def catalog(tmp_path) -> Catalog:
+    catalog = Catalog(tmp_path / "catalog.sqlite3")
+    catalog.add_card_dicts(json.loads(FIXTURE.read_text()))
+    catalog.mark_synced()
+    return catalog
+
+
+def ids(cards) -> list[str]:
+    return [card.id for card in cards]
+
+
+def test_search_matches_contained_text_in_any_case(catalog):
+    assert ids(catalog.search({"name": "pika"})) == ["base1-58", "xy2-35"]
+    assert ids(catalog.search({"name": "PIKACHU", "set_name": "flash"})) == ["xy2-35"]
+    assert ids(catalog.search({"rarity": "uncommon"})) == ["sm3-58", "swsh3-136"]
+    assert ids(catalog.search({"id": "SWSH3"})) == ["swsh3-136"]
+
+
+def test_search_folds_case_beyond_ascii(catalog):
+    assert ids(catalog.search({"name": "POKÉMON"})) == ["sm3-58"]
+    assert ids(catalog.search({"name": "FLABÉBÉ"})) == ["xy1-103"]
+    assert ids(catalog.search({"name": "nidoran♀"})) == ["sv3pt5-029"]
+
+
+def test_search_treats_like_wildcards_as_text(catalog):
+    assert catalog.search({"name": "%"}) == []
+    assert catalog.search({"name": "P_kachu"}) == []
+    assert catalog.search({}) == []
+
+
+def test_search_finds_updated_cards(catalog):
+    card = json.loads(FIXTURE.read_text())[4]
+    card["name"] = "Fürret"
+    catalog.add_card_dicts([card])
+    assert ids(catalog.search({"name": "FÜRRET"})) == ["swsh3-136"]
+    assert catalog.search({"name": "Furret"}) == []
+    assert catalog.count() == 6
+
+
+def test_get_cards_skips_unknown_ids(catalog):
+    cards = catalog.get_cards(["swsh3-136", "nope-1", "base1-58"])
+    assert ids(cards) == ["base1-58", "swsh3-136"]
+    assert cards[0].variants.firstEdition
+    assert not cards[0].variants.reverse
+
+
+def test_open_catalog_needs_a_recent_snapshot(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    assert open_catalog(path) is None
+
+    catalog = Catalog(path)
+    assert open_catalog(path) is None
+
+    catalog.mark_synced()
+    assert open_catalog(path) is not None
+
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute(
+            "UPDATE meta SET value = datetime('now', '-8 days')"
+            " WHERE key = 'synced_at'"
+        )
+    assert open_catalog(path) is None
+    assert open_catalog(path, max_age=9 * 86400) is not None
+
+
+class FakeClient:
+    """Serves the fixture cards, failing the first fetches of some."""
+
+    def __init__(self, failures: dict[str, int]):
+        self.cards = {card["id"]: card for card in json.loads(FIXTURE.read_text())}
+        self.failures = dict(failures)
+
+    async def list_sets(self):
+        return [
+            SimpleNamespace(id=card["set"]["id"], name=card["set"]["name"])
+            for card in self.cards.values()
+        ]
+
+    async def list_rarities(self):
+        return sorted({card["rarity"] for card in self.cards.values()})
+
+    async def list_cards(self):
+        return [SimpleNamespace(id=card_id) for card_id in self.cards]
+
+    async def get_card(self, card_id):
+        if self.failures.get(card_id, 0) > 0:
+            self.failures[card_id] -= 1
+            raise OSError("connection reset")
+        card = self.cards[card_id]
+        return SimpleNamespace(
+            id=card["id"],
+            localId=card["localId"],
+            name=card["name"],
+            rarity=card["rarity"],
+            set=SimpleNamespace(**card["set"]),
+            variants=SimpleNamespace(**card["variants"]),
+        )
+
+
+def test_sync_retries_failed_cards(tmp_path):
+    catalog = Catalog(tmp_path / "catalog.sqlite3")
+    count = asyncio.run(catalog.sync(FakeClient({"xy1-103": 1})))
+    assert count == 6
+    assert catalog.synced_at is not None
+    assert catalog.failed_ids == []
+
+
+def test_sync_missing_cards_is_not_a_snapshot(tmp_path):
+    catalog = Catalog(tmp_path / "catalog.sqlite3")
+    count = asyncio.run(catalog.sync(FakeClient({"xy1-103": 2, "sm3-58": 5})))
+    assert count == 4
+    assert catalog.synced_at is None
+    assert catalog.failed_ids == ["sm3-58", "xy1-103"]
+    assert open_catalog(catalog.path) is None
+
+    asyncio.run(catalog.sync(FakeClient({})))
+    assert catalog.synced_at is not None
+    assert catalog.failed_ids == []
+    assert ids(catalog.search({"name": "pokémon"})) == ["sm3-58"]
+
+
+def test_old_catalogs_are_indexed_for_folded_search(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    Catalog(path).add_card_dicts(json.loads(FIXTURE.read_text()))
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("DELETE FROM cards_folded")
+
+    assert ids(Catalog(path).search({"name": "POKÉMON"})) == ["sm3-58"]
+
+
+def test_shared_catalog_waits_to_look_again(tmp_path):
+    path = tmp_path / "catalog.sqlite3"
+    assert catalog_module.shared_catalog(path) is None
+
+    Catalog(path).mark_synced()
+    assert catalog_module.shared_catalog(path) is None
+
+
+def test_shared_catalog_picks_up_a_sync(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_RECHECK_INTERVAL", 0.0)
+    path = tmp_path / "catalog.sqlite3"
+    assert catalog_module.shared_catalog(path) is None
+
+    Catalog(path).mark_synced()
+    catalog = catalog_module.shared_catalog(path)
+    assert catalog is not None
+    assert catalog_module.shared_catalog(path) is catalog
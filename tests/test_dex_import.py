@@ -0,0 +1,117 @@
+import codecs
+import io
+import logging
+from pathlib import Path
+
+import pytest
+
+from tcglabels.dex_import import DexReader, MalformedRow, NotADexExport
+from tcglabels.models import Card
+
+EXPORT = (Path(__file__).parent / "fixtures" / "dex_export.csv").read_text("utf-8")
+
+CARDS = [
+    Card("base1-58", "Pikachu", "Base", "Common", "normal"),
+    Card("xy1-103", "Flabébé", "XY", "Common", "reverse"),
+    Card("sm3-58", "Pokémon Center Lady", "Burning Shadows", "Uncommon", "normal"),
+    Card("sv3pt5-029", "Nidoran; Female", "151", "Common", "holo"),
+]
+
+
+def read(data: bytes, chunk_size: int = 16) -> tuple[list[Card], DexReader]:
+    reader = DexReader(io.BytesIO(data), chunk_size=chunk_size)
+    return list(reader), reader
+
+
+@pytest.mark.parametrize(
+    "data, encoding",
+    [
+        (EXPORT.encode("utf-8"), "utf-8"),
+        (codecs.BOM_UTF8 + EXPORT.encode("utf-8"), "utf-8-sig"),
+        (EXPORT.encode("cp1252"), "latin-1"),
+        (EXPORT.replace("\n", "\r\n").encode("cp1252"), "latin-1"),
+        (codecs.BOM_UTF16_LE + EXPORT.encode("utf-16-le"), "utf-16"),
+        (EXPORT.encode("utf-16-le"), "utf-16-le"),
+    ],
+    ids=["utf-8", "utf-8-bom", "cp1252", "cp1252-crlf", "utf-16-bom", "utf-16"],
+)
+@pytest.mark.parametrize("chunk_size", [4, 7, 64 * 1024])
+def test_reads_each_encoding(data, encoding, chunk_size):
+    cards, reader = read(data, chunk_size)
+
+    assert cards == CARDS
+    assert reader.encoding == encoding
+    assert reader.rows == len(CARDS)
+    assert reader.errors == []
+
+
+def test_falls_back_to_latin1_after_the_head(caplog):
+    head, tail = EXPORT.split("xy1-103")
+    data = head.encode("utf-8") + ("xy1-103" + tail).encode("cp1252")
+
+    with caplog.at_level(logging.WARNING, logger="tcglabels.dex_import"):
+        cards, reader = read(data, chunk_size=len(head))
+
+    assert cards == CARDS
+    assert reader.encoding == "latin-1"
+    position = data.index("é".encode("cp1252"))
+    assert [record.args for record in caplog.records] == [(position,)]
+
+
+def test_falls_back_within_a_held_back_character(caplog):
+    data = EXPORT.encode("utf-8") + "base1-1;Alakazam é;Base;Holo Rare;\n".encode(
+        "cp1252"
+    )
+    position = data.rindex("é".encode("cp1252"))
+
+    # The first chunk ends on the byte, which starts a UTF-8 sequence and is
+    # held back until the next chunk shows it isn't one.
+    with caplog.at_level(logging.WARNING, logger="tcglabels.dex_import"):
+        cards, reader = read(data, chunk_size=position + 1)
+
+    assert cards[:-1] == CARDS
+    assert cards[-1].name == "Alakazam é"
+    assert reader.encoding == "latin-1"
+    assert [record.args for record in caplog.records] == [(position,)]
+
+
+def test_skips_malformed_rows(caplog):
+    data = (
+        "Id;Name;Set;Rarity;Variant\n"
+        "base1-58;Pikachu;Base;Common;normal\n"
+        "base1-4;Charizard;Base\n"
+        ";;Base;Common;normal\n"
+        '"base1-2;Blastoise;Base;Rare;"holo\n'
+        "\n"
+        "base1-1;Alakazam;Base;Holo Rare;\n"
+    ).encode()
+
+    with caplog.at_level(logging.WARNING, logger="tcglabels.dex_import"):
+        cards, reader = read(data)
+
+    assert [card.number for card in cards] == ["base1-58", "base1-1"]
+    assert [error.line for error in reader.errors] == [3, 4, 5]
+    assert reader.errors[:2] == [
+        MalformedRow(3, "expected 5 fields, found 3"),
+        MalformedRow(4, "no Id or Name"),
+    ]
+    assert len(caplog.records) == 3
+    assert reader.rows == 4
+
+
+def test_optional_columns_may_be_missing():
+    cards, _ = read(b"Name;Id\nPikachu;base1-58\n")
+
+    assert cards == [Card("base1-58", "Pikachu", "", "", "")]
+
+
+def test_rejects_files_without_id_and_name():
+    with pytest.raises(NotADexExport, match="Id, Name"):
+        read(b"Card;Set\nPikachu;Base\n")
+
+
+def test_empty_file():
+    cards, reader = read(b"")
+
+    assert cards == []
+    assert reader.errors == []
@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from tcglabels.artifacts import ArtifactStore
+from tcglabels.import_jobs import ImportJob, ImportStage
+from tcglabels.label_generator import LABEL_SIZES, Font, LabelGenerator, OutputMode
+from tcglabels.models import Card
+from tcglabels.sheet_layout import SHEET_LAYOUTS
+
+CARDS = [
+    Card(f"swsh3-{i}", f"Furret {i}", "Darkness Ablaze", "Uncommon", "")
+    for i in range(25)
+]
+
+
+def dex_export(cards: list[Card]) -> io.BytesIO:
+    lines = ["Id;Name;Set;Rarity;Variant"]
+    lines += [
+        f"{card.number};{card.name};{card.set_name};{card.rarity};{card.finish}"
+        for card in cards
+    ]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+def generator(**options) -> LabelGenerator:
+    return LabelGenerator(
+        size=LABEL_SIZES['1.5"x0.5"'], font=Font.OPENSANS, workers=1, **options
+    )
+
+
+@pytest.mark.parametrize("output_mode", OutputMode)
+@pytest.mark.parametrize("sheet", [None, next(iter(SHEET_LAYOUTS.values()))])
+def test_pages_report_their_labels(output_mode, sheet):
+    pages = []
+    count = generator(output_mode=output_mode, sheet=sheet).write_labels_pdf(
+        iter(CARDS), io.BytesIO(), on_page=pages.append
+    )
+
+    assert len(pages) == count
+    assert sum(pages) == len(CARDS)
+    if sheet is None:
+        assert set(pages) == {1}
+
+
+def test_progress_counts_written_labels(tmp_path):
+    written = []
+
+    class Generator(LabelGenerator):
+        def write_labels_pdf(self, cards, sink, on_page=None):
+            def record(labels):
+                on_page(labels)
+                written.append(job.labels_rendered)
+
+            return super().write_labels_pdf(cards, sink, on_page=record)
+
+    job = ImportJob(
+        [dex_export(CARDS)],
+        Generator(size=LABEL_SIZES['1.5"x0.5"'], font=Font.OPENSANS, workers=1),
+        store=ArtifactStore(tmp_path, secret=b"secret"),
+    )
+    job.run()
+
+    assert job.stage is ImportStage.DONE
+    assert written == list(range(1, len(CARDS) + 1))
+    assert job.labels_rendered == job.label_count == len(CARDS)
@@ -0,0 +1,113 @@
+import io
+import os
+
+from tcglabels.label_cache import LabelCache
+from tcglabels.label_generator import LABEL_SIZES, Font, LabelGenerator
+from tcglabels.models import Card
+from tcglabels.pdf_writer import EncodedPage
+
+KEYS = [f"{i:02x}" * 32 for i in range(4)]
+
+
+def page(size: int, fill: bytes = b"x") -> EncodedPage:
+    return EncodedPage(10, 10, "DeviceGray", 8, "FlateDecode", fill * size)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LabelCache(max_bytes=250)
+    cache.put(KEYS[0], page(100))
+    cache.put(KEYS[1], page(100))
+    assert cache.get(KEYS[0]) is not None
+    cache.put(KEYS[2], page(100))
+
+    assert cache.get(KEYS[1]) is None
+    assert cache.get(KEYS[0]) is not None
+    assert cache.get(KEYS[2]) is not None
+    assert cache.stats()["bytes"] == 200
+
+
+def test_memory_tier_skips_pages_larger_than_the_limit():
+    cache = LabelCache(max_bytes=50)
+    cache.put(KEYS[0], page(100))
+    assert cache.get(KEYS[0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_tier_is_shared(tmp_path):
+    LabelCache(directory=tmp_path).put(KEYS[0], page(100, b"a"))
+
+    cache = LabelCache(directory=tmp_path)
+    assert cache.get(KEYS[0]) == page(100, b"a")
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(KEYS[0]) == page(100, b"a")
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = LabelCache(max_bytes=0, directory=tmp_path, max_disk_bytes=1200)
+    for i, key in enumerate(KEYS[:3]):
+        cache.put(key, page(300))
+        os.utime(cache._path(key), (i, i))
+    # Reading an entry makes it the most recently used.
+    assert cache.get(KEYS[0]) is not None
+
+    cache.put(KEYS[3], page(300))
+
+    assert not cache._path(KEYS[1]).exists()
+    assert all(cache._path(key).exists() for key in (KEYS[0], KEYS[2], KEYS[3]))
+    assert cache.stats()["disk_bytes"] <= 1080
+
+
+def test_disk_tier_ignores_files_being_written(tmp_path):
+    cache = LabelCache(directory=tmp_path, max_disk_bytes=500)
+    cache.put(KEYS[0], page(100))
+    temp = tmp_path / KEYS[1][:2] / "tmpabc123.tmp"
+    temp.parent.mkdir(exist_ok=True)
+    temp.write_bytes(b"x" * 1000)
+
+    assert LabelCache(directory=tmp_path).stats()["disk_bytes"] < 500
+    cache.put(KEYS[2], page(300))
+    assert temp.exists()
+    assert cache._path(KEYS[0]).exists()
+
+
+def test_damaged_disk_entries_are_misses(tmp_path):
+    cache = LabelCache(directory=tmp_path)
+    for key, raw in [
+        (KEYS[0], b'[10, 10, "DeviceGr'),
+        (KEYS[1], b"[10, 10]\ndata"),
+        (KEYS[2], b"not json\ndata"),
+    ]:
+        path = cache._path(key)
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(raw)
+
+    for key in KEYS[:3]:
+        assert cache.get(key) is None
+        assert not cache._path(key).exists()
+    assert cache.stats()["misses"] == 3
+
+    cache.put(KEYS[0], page(10))
+    assert LabelCache(directory=tmp_path).get(KEYS[0]) == page(10)
+
+
+def test_cached_pdfs_are_identical(tmp_path):
+    cards = [
+        Card(f"swsh3-{i}", f"Furret {i % 7}", "Darkness Ablaze", "Uncommon", "")
+        for i in range(20)
+    ]
+
+    def pdf(cache: LabelCache | None) -> bytes:
+        generator = LabelGenerator(
+            size=LABEL_SIZES['1.5"x0.5"'], font=Font.OPENSANS, workers=1, cache=cache
+        )
+        sink = io.BytesIO()
+        generator.write_labels_pdf(cards, sink)
+        return sink.getvalue()
+
+    uncached = pdf(None)
+    cache = LabelCache(directory=tmp_path)
+    assert pdf(cache) == uncached
+    assert pdf(cache) == uncached
+    assert pdf(LabelCache(directory=tmp_path)) == uncached
+    assert cache.stats()["hits"] == 20
@@ -0,0 +1,107 @@
+import asyncio
+
+from tcglabels.models import Card
+from tcglabels.search_cache import SearchCache
+
+
+def card(number: str) -> Card:
+    return Card(
+        number=number, name="Pikachu", set_name="Base", rarity="Common", finish=""
+    )
+
+
+async def collect(cache: SearchCache, form_data: dict, fetch) -> list[Card]:
+    return [c async for batch in cache.stream(form_data, fetch) for c in batch]
+
+
+def test_fetches_with_the_fields_of_the_cache_key():
+    queries = []
+
+    async def fetch(fields, missing):
+        queries.append(fields)
+        yield [card("base1-58")]
+
+    async def main():
+        cache = SearchCache()
+        await collect(cache, {"name": " Pikachu "}, fetch)
+        await collect(cache, {"name": "PIKACHU"}, fetch)
+        return cache.stats()
+
+    stats = asyncio.run(main())
+    assert queries == [{"name": "pikachu", "set_name": "", "rarity": "", "id": ""}]
+    assert stats["hits"] == 1
+
+
+def test_results_missing_cards_are_not_cached():
+    calls = 0
+
+    async def fetch(fields, missing):
+        nonlocal calls
+        calls += 1
+        missing.append("base1-59")
+        yield [card("base1-58")]
+
+    async def main():
+        cache = SearchCache()
+        first = await collect(cache, {"name": "Pikachu"}, fetch)
+        second = await collect(cache, {"name": "Pikachu"}, fetch)
+        return first, second, cache.stats()
+
+    first, second, stats = asyncio.run(main())
+    assert first == second == [card("base1-58")]
+    assert calls == 2
+    assert stats["entries"] == 0
+
+
+def test_concurrent_identical_searches_share_one_fetch():
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch(fields, missing):
+        nonlocal calls
+        calls += 1
+        yield [card("base1-58")]
+        await release.wait()
+        yield [card("xy2-35")]
+
+    async def main():
+        cache = SearchCache()
+        searches = [
+            asyncio.create_task(collect(cache, {"name": name}, fetch))
+            for name in ("Pikachu", "pikachu ")
+        ]
+        await asyncio.sleep(0)
+        in_flight = cache.stats()["in_flight"]
+        release.set()
+        return await asyncio.gather(*searches), in_flight, cache.stats()
+
+    results, in_flight, stats = asyncio.run(main())
+    assert results == [[card("base1-58"), card("xy2-35")]] * 2
+    assert calls == 1
+    assert in_flight == 1
+    assert (stats["misses"], stats["coalesced"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_fetch_is_cancelled_when_its_last_follower_leaves():
+    fetching = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch(fields, missing):
+        fetching.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        yield []
+
+    async def main():
+        cache = SearchCache()
+        search = asyncio.create_task(collect(cache, {"name": "Pikachu"}, fetch))
+        await fetching.wait()
+        search.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return cache.stats()
+
+    stats = asyncio.run(main())
+    assert (stats["in_flight"], stats["entries"]) == (0, 0)
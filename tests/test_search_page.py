@@ -0,0 +1,50 @@
+import asyncio
+import importlib
+
+from tcglabels.models import Card
+from tcglabels.search_cache import SearchCache
+
+# The pages package exports the page itself as "search".
+search_page = importlib.import_module("tcglabels.pages.search")
+
+
+def test_new_search_cancels_the_one_it_supersedes(monkeypatch):
+    monkeypatch.setattr(search_page, "_running_searches", {})
+    cancelled = []
+    ended = []
+    fetching = asyncio.Event()
+
+    async def fetch(fields, missing):
+        try:
+            if fields["name"] == "first":
+                fetching.set()
+                await asyncio.Event().wait()
+            yield [Card(fields["name"], "Pikachu", "Base", "Common", "")]
+        except asyncio.CancelledError:
+            cancelled.append(fields["name"])
+            raise
+
+    async def search(cache: SearchCache, name: str) -> list[Card]:
+        # What CardsTableState.search_cards does around its search.
+        task = asyncio.current_task()
+        search_page._start_search("client", task)
+        try:
+            return [c async for b in cache.stream({"name": name}, fetch) for c in b]
+        finally:
+            ended.append((name, search_page._end_search("client", task)))
+
+    async def main():
+        cache = SearchCache()
+        first = asyncio.create_task(search(cache, "first"))
+        await fetching.wait()
+        second = await search(cache, "second")
+        await asyncio.gather(first, return_exceptions=True)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.cancelled()
+    assert cancelled == ["first"]
+    assert [card.number for card in second] == ["second"]
+    # Only the latest search clears the client's searching flag.
+    assert sorted(ended) == [("first", False), ("second", True)]
+    assert search_page._running_searches == {}
@@ -0,0 +1,42 @@
+import asyncio
+
+from benchmarks.fake_tcgdex import FakeTCGdex
+from tcglabels import tcg_search
+from tcglabels.tcgdex_client import TCGdexClient
+
+CARDS = 40
+RTT = 0.05
+CONCURRENCY = 8
+FAILING = ["bench-003", "bench-017"]
+
+
+async def search(endpoint: str) -> list:
+    async with TCGdexClient(endpoint, pool_size=CONCURRENCY, retries=0) as client:
+        return [
+            card
+            async for batch in tcg_search.search_cards(
+                {"name": "Benchmark"},
+                concurrency=CONCURRENCY,
+                cache=None,
+                client=client,
+            )
+            for card in batch
+        ]
+
+
+def test_search_cards_fetches_concurrently_and_drops_failures(tmp_path, monkeypatch):
+    # Search the fake API, not a catalog in the working directory.
+    monkeypatch.chdir(tmp_path)
+    with FakeTCGdex(count=CARDS, rtt=RTT, failing=FAILING) as server:
+        found = asyncio.run(search(server.endpoint))
+
+    numbers = {card.number for card in found}
+    assert numbers == {f"bench-{i:03d}" for i in range(CARDS)} - set(FAILING)
+    # One card per variant; the fake's cards are normal and reverse holo.
+    assert len(found) == 2 * (CARDS - len(FAILING))
+
+    # The card list, then each full card once, several at a time but never
+    # more than CONCURRENCY. Counted at the server rather than timed, so a
+    # slow machine can't fail the test.
+    assert server.requests == 1 + CARDS
+    assert 1 < server.max_in_flight <= CONCURRENCY
@@ -0,0 +1,85 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+from PIL import ImageChops
+
+from tcglabels.label_generator import (
+    LABEL_SIZES,
+    Font,
+    LabelGenerator,
+    RenderProfile,
+    TextEngine,
+)
+from tcglabels.models import Card
+
+FIXTURE = Path(__file__).parent / "fixtures" / "cards.json"
+
+# How far a label drawn from the glyph atlas may be from one drawn by
+# draw.text. Glyphs are placed at the same rounded positions, but the atlas
+# rasterizes each glyph on its own, so where neighbouring glyphs overlap an
+# antialiased edge pixel can come out a little differently.
+MAX_DIFFERING_PIXELS = 16
+MAX_PIXEL_DELTA = 96
+
+# Characters of card names and numbers, including some outside cp1252.
+CHARACTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .-'&é♀♂δ★"
+
+
+def cards() -> list[Card]:
+    found = [
+        Card(
+            number=card["id"],
+            name=card["name"],
+            set_name=card["set"]["name"],
+            rarity=card["rarity"],
+            finish="Normal",
+        )
+        for card in json.loads(FIXTURE.read_text())
+    ]
+    rng = random.Random(1)
+    for _ in range(30):
+        found.append(
+            Card(
+                number="".join(rng.choices(CHARACTERS, k=8)),
+                name="".join(rng.choices(CHARACTERS, k=rng.randint(3, 40))),
+                set_name="".join(rng.choices(CHARACTERS, k=12)),
+                rarity="Rare",
+                finish="Holo",
+            )
+        )
+    return found
+
+
+@pytest.mark.parametrize("profile", list(RenderProfile))
+@pytest.mark.parametrize("size", list(LABEL_SIZES))
+@pytest.mark.parametrize("font", [Font.OPENSANS, Font.OPENSANS_BOLD])
+def test_atlas_matches_freetype(font, size, profile):
+    generators = [
+        LabelGenerator(
+            size=LABEL_SIZES[size],
+            font=font,
+            workers=1,
+            profile=profile,
+            text_engine=engine,
+        )
+        for engine in (TextEngine.FREETYPE, TextEngine.ATLAS)
+    ]
+    for card in cards():
+        expected, actual = (generator.render_label(card) for generator in generators)
+        assert actual.mode == expected.mode
+        assert actual.size == expected.size
+        diff = ImageChops.difference(expected.convert("L"), actual.convert("L"))
+        assert sum(diff.histogram()[1:]) <= MAX_DIFFERING_PIXELS, card
+        assert diff.getextrema()[1] <= MAX_PIXEL_DELTA, card
+
+
+def test_engines_have_their_own_cache_and_pdf_keys():
+    card = cards()[0]
+    freetype, atlas = (
+        LabelGenerator(size=(450, 150), font=Font.OPENSANS, text_engine=engine)
+        for engine in (TextEngine.FREETYPE, TextEngine.ATLAS)
+    )
+    assert freetype.cache_key(card) != atlas.cache_key(card)
+    assert freetype.pdf_key([card]) != atlas.pdf_key([card])